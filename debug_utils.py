@@ -11,27 +11,51 @@ import time
 import logging
 import os
 import numpy as np
-from typing import Tuple
+from typing import List, Tuple
 from utils.common_utils import ensure_directory_exists
 
 logger = logging.getLogger(__name__)
 
+# Encoder parameters per debug screenshot format, tuned for write speed.
+# Boolean flags must be passed as 0/1, OpenCV rejects Python bools here.
+DEBUG_WRITE_PARAMS = {
+    'jpg': [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 0],
+    'png': [
+        cv2.IMWRITE_PNG_COMPRESSION, 1,
+        cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_RLE
+    ],
+    'bmp': [],
+}
+DEFAULT_DEBUG_FORMAT = 'jpg'
+
 
 def debug_mark_positions(
     frame: np.ndarray, 
     button_line_area: Tuple[int, int, int, int], 
     button_rect: Tuple[int, int, int, int], 
-    debug_output_dir: str = "/tmp"
+    debug_output_dir: str = "/tmp",
+    output_format: str = DEFAULT_DEBUG_FORMAT,
+    copy_frame: bool = True
 ):
     """
     Mark detected positions on screenshot for debugging
     
+    Encodes and writes the screenshot before returning, callers on the
+    detection path run it on a background thread.
+    
     Args:
         frame: Screen screenshot
         button_line_area: Button line area coordinates (x, y, width, height)
         button_rect: Button coordinates (x, y, width, height)
         debug_output_dir: Directory to save debug screenshots
+        output_format: Screenshot file format (jpg, png or bmp)
+        copy_frame: Whether to draw on a copy, False if the caller already
+            passes a private copy that is not used afterwards
     """
+    # Draw on a private copy so the caller's frame stays untouched
+    if copy_frame:
+        frame = frame.copy()
+    
     # Ensure debug output directory exists
     try:
         ensure_directory_exists(debug_output_dir, "/tmp")
@@ -39,44 +63,55 @@ def debug_mark_positions(
         logger.error("Failed to create debug output directory: %s", e)
         debug_output_dir = "/tmp"
     
-    # Draw rectangle around detection area (line area)
+    # Compute all coordinates up front, the drawing calls then take prebuilt tuples
     ax, ay, aw, ah = button_line_area
-    cv2.rectangle(frame, (ax, ay), (ax + aw, ay + ah), (255, 0, 0), 2)
-    cv2.putText(frame, 'Line Area', (ax, ay-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
+    bx, by, bw, bh = button_rect
+    # Mark actual click point (at 65% height of the button)
+    click_point = (bx + bw // 2, by + int(bh * 0.65))
+    button_center = (bx + bw // 2, by + bh // 2)
     
     # Log line area coordinates
-    logger.info(f"Line area coordinates: x={ax}, y={ay}, width={aw}, height={ah}")
+    logger.info("Line area coordinates: x=%s, y=%s, width=%s, height=%s", ax, ay, aw, ah)
     
-    # Draw rectangle around detected button area
-    bx, by, bw, bh = button_rect
+    # Draw rectangles around the detection area (line area) and the detected button
+    cv2.rectangle(frame, (ax, ay), (ax + aw, ay + ah), (255, 0, 0), 2)
     cv2.rectangle(frame, (bx, by), (bx + bw, by + bh), (0, 255, 0), 2)
-    cv2.putText(frame, 'Detected Button', (bx, by-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-    
-    # Mark actual click point (at 65% height of the button)
-    click_y = by + int(bh * 0.65)
-    click_x = bx + bw // 2
-    cv2.circle(frame, (click_x, click_y), 5, (0, 0, 255), -1)
-    cv2.putText(frame, 'Click Point', (click_x+10, click_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-    
+    cv2.circle(frame, click_point, 5, (0, 0, 255), -1)
     # Draw a line from button center to click point to visualize offset
-    center_x = bx + bw // 2
-    center_y = by + bh // 2
-    cv2.line(frame, (center_x, center_y), (click_x, click_y), (255, 255, 0), 1)
+    cv2.line(frame, button_center, click_point, (255, 255, 0), 1)
+    
+    # Text rendering is the slowest part of the marking, label only when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        for text, origin, color in (
+            ('Line Area', (ax, ay - 10), (255, 0, 0)),
+            ('Detected Button', (bx, by - 10), (0, 255, 0)),
+            ('Click Point', (click_point[0] + 10, click_point[1]), (0, 0, 255)),
+        ):
+            cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
     
     # Save debug image
+    output_format = output_format.lower()
+    if output_format not in DEBUG_WRITE_PARAMS:
+        logger.warning("Unsupported debug output format %s, using %s", output_format, DEFAULT_DEBUG_FORMAT)
+        output_format = DEFAULT_DEBUG_FORMAT
+    write_params = DEBUG_WRITE_PARAMS[output_format]
     timestamp = int(time.time())
-    filename = os.path.join(debug_output_dir, f'debug_screenshot_{timestamp}.png')
-        
+    filename = os.path.join(debug_output_dir, f'debug_screenshot_{timestamp}.{output_format}')
+    _write_screenshot(frame, filename, write_params)
+
+
+def _write_screenshot(frame: np.ndarray, filename: str, write_params: List[int]) -> None:
+    """Write a debug screenshot, falling back to /tmp on failure"""
     try:
-        cv2.imwrite(filename, frame)
+        cv2.imwrite(filename, frame, write_params)
         logger.info("Debug screenshot saved to: %s", filename)
     except Exception as e:
         logger.error("Failed to save debug screenshot to %s: %s", filename, e)
             
         # Try fallback to /tmp
-        fallback_filename = f'/tmp/debug_screenshot_{timestamp}.png'
+        fallback_filename = os.path.join('/tmp', os.path.basename(filename))
         try:
-            cv2.imwrite(fallback_filename, frame)
+            cv2.imwrite(fallback_filename, frame, write_params)
             logger.info("Debug screenshot saved to fallback location: %s", fallback_filename)
         except Exception as fallback_e:
-            logger.error("Failed to save debug screenshot to fallback location: %s", fallback_e)
\ No newline at end of file
+            logger.error("Failed to save debug screenshot to fallback location: %s", fallback_e)
@@ -62,10 +62,10 @@ if ! sudo apt install -y xdotool; then
     echo "Warning: Failed to install xdotool. Some screenshot methods may not work."
 fi
 
-# Install ImageMagick for xwd conversion
-echo "Installing ImageMagick..."
-if ! sudo apt install -y imagemagick; then
-    echo "Warning: Failed to install ImageMagick. Some screenshot methods may not work."
+# Install xwd for the window capture fallback
+echo "Installing x11-apps (xwd)..."
+if ! sudo apt install -y x11-apps; then
+    echo "Warning: Failed to install x11-apps. Some screenshot methods may not work."
 fi
 
 echo "Installation completed!"
@@ -6,22 +6,98 @@ Author: Stephen Chen
 Company: Navinfo
 """
 
+import atexit
 import cv2
 import numpy as np
 import pyautogui
 import subprocess
 import os
+import shutil
+import struct
 import tempfile
+import time
 import logging
 from typing import Optional, List, Tuple
-from utils.common_utils import create_temp_file
+from utils.xcb import create_xcb
+from utils.xdo import create_xdo
+
+try:
+    from mss import mss
+except ImportError:
+    mss = None
 
 logger = logging.getLogger(__name__)
 
+# X11 XWD file header: 25 big-endian CARD32 fields followed by the window name
+XWD_HEADER = struct.Struct('>25I')
+# Size of one XWDColor colormap entry (pixel, red, green, blue, flags, pad)
+XWD_COLOR_SIZE = 12
+XWD_Z_PIXMAP = 2
+XWD_LSB_FIRST = 0
+# Keep capture temporary files in memory (tmpfs) when available
+TEMP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+def read_xwd(filename: str) -> Optional[np.ndarray]:
+    """
+    Read a 32 bits per pixel ZPixmap XWD dump into a BGR image
+    
+    Args:
+        filename: Path to the XWD file written by xwd
+        
+    Returns:
+        BGR image as numpy array, or None if the dump format is not supported
+    """
+    with open(filename, 'rb') as f:
+        header = XWD_HEADER.unpack(f.read(XWD_HEADER.size))
+        (header_size, _, pixmap_format, _, width, height, _, byte_order,
+         _, _, _, bits_per_pixel, bytes_per_line, _, _, _, _, _, _, ncolors) = header[:20]
+        
+        if pixmap_format != XWD_Z_PIXMAP or bits_per_pixel != 32:
+            logger.debug(
+                "Unsupported XWD format: pixmap_format=%s, bits_per_pixel=%s",
+                pixmap_format, bits_per_pixel
+            )
+            return None
+        
+        # Skip the window name and colormap entries to reach the pixel data
+        f.seek(header_size + ncolors * XWD_COLOR_SIZE)
+        pixels = np.fromfile(f, dtype=np.uint8, count=height * bytes_per_line)
+    
+    if pixels.size != height * bytes_per_line:
+        logger.debug("Truncated XWD pixel data")
+        return None
+    
+    pixels = pixels.reshape(height, bytes_per_line)[:, :width * 4].reshape(height, width, 4)
+    if byte_order == XWD_LSB_FIRST:
+        # Pixels are stored as B, G, R, X
+        return cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR)
+    # Pixels are stored as X, R, G, B
+    return np.ascontiguousarray(pixels[:, :, 3:0:-1])
+
 
 class ScreenCapture:
     def __init__(self, config):
         self.config = config
+        # Persistent mss instance keeps one X connection (XShm) for all grabs
+        self._sct = None
+        if mss is not None:
+            try:
+                self._sct = mss()
+            except Exception as e:
+                logger.debug("mss unavailable, falling back to xwd: %s", e)
+        # Persistent libxdo handle for window queries, None to use the xdotool command
+        self._xdo = create_xdo()
+        # Persistent xcffib connection for window search, None to use the xdotool command
+        self._xcb = create_xcb()
+        # Frame buffer reused across mss grabs of the same resolution
+        self._frame_buf: Optional[np.ndarray] = None
+        # Private directory (mode 0700) holding one temporary file per capture method
+        self._temp_dir: Optional[str] = None
+        atexit.register(self._cleanup_temp_files)
+        # Recently captured VSCode window, reused until it expires or a capture fails
+        self._window_cache = {'id': None, 'geom': (0, 0, 0, 0), 'expires': 0}
+        self._window_cache_ttl = config.get('window_cache_ttl', 2.0) if config else 2.0
 
     def capture_screen(self) -> Optional[Tuple[np.ndarray, int, int]]:
         """
@@ -34,7 +110,7 @@ class ScreenCapture:
         # Try multiple methods to capture screen to avoid flickering
         # Get preferred methods from config, or use defaults
         preferred_methods = self.config.get('screenshot_methods', []) if self.config else []
-        logger.debug(f"Preferred screenshot methods from config: {preferred_methods}")
+        logger.debug("Preferred screenshot methods from config: %s", preferred_methods)
         
         # Map method names to actual functions
         method_map = {
@@ -65,24 +141,26 @@ class ScreenCapture:
             logger.debug("Using configured screenshot method order")
         
         # Log the order of methods that will be tried
-        method_names = [method.__name__ for method in methods]
-        logger.debug(f"Screenshot methods will be tried in this order: {method_names}")
+        if logger.isEnabledFor(logging.DEBUG):
+            method_names = [method.__name__ for method in methods]
+            logger.debug("Screenshot methods will be tried in this order: %s", method_names)
         
         for method in methods:
             try:
-                logger.debug(f"Trying screenshot method: {method.__name__}")
+                logger.debug("Trying screenshot method: %s", method.__name__)
                 result = method()
                 if result is not None:
                     frame, offset_x, offset_y = result
                     logger.info(
-                        f"Screenshot captured successfully using {method.__name__}, "
-                        f"shape: {frame.shape}, window offset: ({offset_x}, {offset_y})"
+                        "Screenshot captured successfully using %s, "
+                        "shape: %s, window offset: (%s, %s)",
+                        method.__name__, frame.shape, offset_x, offset_y
                     )
                     return (frame, offset_x, offset_y)
                 else:
-                    logger.debug(f"Screenshot method {method.__name__} returned None")
+                    logger.debug("Screenshot method %s returned None", method.__name__)
             except Exception as e:
-                logger.debug(f"Screenshot method {method.__name__} failed: {e}")
+                logger.debug("Screenshot method %s failed: %s", method.__name__, e)
                 continue
         
         logger.error("All screenshot methods failed")
@@ -92,208 +170,301 @@ class ScreenCapture:
         """Capture VSCode window directly using X11 functions to avoid flickering"""
         logger.debug("Attempting X11 window capture")
         try:
-            # Try to find the active VSCode window and capture it directly
-            # First get the active window ID
-            active_result = subprocess.run(
-                ['xdotool', 'getwindowfocus'], 
-                capture_output=True, text=True, timeout=5
-            )
+            # Reuse the recently captured window while the cache is fresh
+            window_id = self._window_cache['id']
+            if window_id and time.monotonic() < self._window_cache['expires']:
+                logger.debug("Using cached VSCode window ID: %s", window_id)
+                result = self._capture_single_window(window_id)
+                if result is not None:
+                    return result
+                logger.debug("Capture of cached window failed, looking up VSCode window again")
             
-            if active_result.returncode == 0 and active_result.stdout.strip():
-                active_window_id = active_result.stdout.strip()
-                logger.debug(f"Active window ID: {active_window_id}")
-                
-                # Check if the active window is a VSCode window
-                get_name_result = subprocess.run(
-                    ['xdotool', 'getwindowname', active_window_id],
-                    capture_output=True, text=True, timeout=5
-                )
-                
-                if (get_name_result.returncode == 0 and 
-                    'Visual Studio Code' in get_name_result.stdout.strip()):
-                    logger.debug(f"Active window is VSCode: {get_name_result.stdout.strip()}")
-                    # Capture this active VSCode window
-                    return self._capture_single_window(active_window_id)
-                else:
-                    logger.debug("Active window is not VSCode, searching for VSCode windows")
-                    # If active window is not VSCode, fall back to finding any VSCode window
-                    search_result = subprocess.run(
-                        ['xdotool', 'search', '--name', 'Visual Studio Code'], 
-                        capture_output=True, text=True, timeout=5
-                    )
-                    
-                    if search_result.returncode == 0 and search_result.stdout.strip():
-                        logger.debug(f"Found VSCode windows: {search_result.stdout.strip()}")
-                        # Get the first VSCode window ID
-                        window_id = search_result.stdout.strip().split('\n')[0]
-                        logger.debug(f"Using first VSCode window ID: {window_id}")
-                        return self._capture_single_window(window_id)
-            else:
-                # If we can't get active window, fall back to searching for VSCode windows
-                logger.debug("Could not get active window, searching for VSCode windows")
-                search_result = subprocess.run(
-                    ['xdotool', 'search', '--name', 'Visual Studio Code'], 
-                    capture_output=True, text=True, timeout=5
-                )
-                
-                if search_result.returncode == 0 and search_result.stdout.strip():
-                    logger.debug(f"Found VSCode windows: {search_result.stdout.strip()}")
-                    # Get the first VSCode window ID
-                    window_id = search_result.stdout.strip().split('\n')[0]
-                    logger.debug(f"Using first VSCode window ID: {window_id}")
-                    return self._capture_single_window(window_id)
-                
-            return None
+            window_id = self._find_vscode_window()
+            if window_id is None:
+                return None
+            return self._capture_single_window(window_id)
         except subprocess.TimeoutExpired:
             logger.debug("Timeout when trying to capture VSCode window with X11")
+            self._invalidate_window_cache()
             return None
         except Exception as e:
-            logger.debug(f"X11 window capture failed: {e}")
+            logger.debug("X11 window capture failed: %s", e)
+            self._invalidate_window_cache()
             return None
     
+    def _find_vscode_window(self) -> Optional[str]:
+        """Find the VSCode window ID, preferring the active window"""
+        # Try to find the active VSCode window and capture it directly
+        # First get the active window ID
+        active_window_id = self._get_focused_window()
+        
+        if active_window_id:
+            logger.debug("Active window ID: %s", active_window_id)
+            
+            # Check if the active window is a VSCode window
+            window_name = self._get_window_name(active_window_id)
+            
+            if window_name is not None and 'Visual Studio Code' in window_name:
+                logger.debug("Active window is VSCode: %s", window_name)
+                return active_window_id
+            logger.debug("Active window is not VSCode, searching for VSCode windows")
+        else:
+            logger.debug("Could not get active window, searching for VSCode windows")
+        
+        # Fall back to finding any VSCode window
+        if self._xcb is not None:
+            window_ids = self._xcb.find_windows_by_name('Visual Studio Code')
+            if window_ids is not None:
+                logger.debug("Found VSCode windows: %s", window_ids)
+                return window_ids[0] if window_ids else None
+        
+        search_result = subprocess.run(
+            ['xdotool', 'search', '--name', 'Visual Studio Code'], 
+            capture_output=True, text=True, timeout=5
+        )
+        
+        if search_result.returncode == 0 and search_result.stdout.strip():
+            logger.debug("Found VSCode windows: %s", search_result.stdout.strip())
+            # Get the first VSCode window ID
+            window_id = search_result.stdout.strip().split('\n')[0]
+            logger.debug("Using first VSCode window ID: %s", window_id)
+            return window_id
+        
+        return None
+    
+    def _invalidate_window_cache(self) -> None:
+        """Forget the cached VSCode window ID and geometry"""
+        self._window_cache['id'] = None
+        self._window_cache['expires'] = 0
+    
     def _capture_single_window(self, window_id: str) -> Optional[Tuple[np.ndarray, int, int]]:
         """Capture a single window by its ID and return window offset"""
-        logger.debug(f"Capturing single window with ID: {window_id}")
+        logger.debug("Capturing single window with ID: %s", window_id)
+        
+        cache_valid = (
+            self._window_cache['id'] == window_id
+            and time.monotonic() < self._window_cache['expires']
+        )
+        geometry = self._window_cache['geom'] if cache_valid else self._get_window_geometry(window_id)
         
-        tmp_xwd = create_temp_file(suffix='.xwd', delete=False)
-        xwd_filename = tmp_xwd.name
-        tmp_xwd.close()
+        result = None
+        if geometry is not None and self._sct is not None:
+            result = self._grab_with_mss(*geometry)
+            if result is not None:
+                logger.debug("Successfully captured VSCode window with mss")
         
-        tmp_png = create_temp_file(suffix='.png', delete=False)
-        png_filename = tmp_png.name
-        tmp_png.close()
+        if result is None:
+            # Fall back to xwd when mss is unavailable or the grab failed
+            offset_x, offset_y = geometry[:2] if geometry is not None else (0, 0)
+            result = self._capture_window_with_xwd(window_id, offset_x, offset_y)
+        
+        if result is None:
+            self._invalidate_window_cache()
+        elif geometry is not None and not cache_valid:
+            # Expiry counts from the lookup, reusing the geometry must not extend
+            # it or a moved or resized window would never be looked up again
+            self._window_cache['id'] = window_id
+            self._window_cache['geom'] = geometry
+            self._window_cache['expires'] = time.monotonic() + self._window_cache_ttl
+        return result
+    
+    def _get_focused_window(self) -> Optional[str]:
+        """Get the focused window ID through libxdo, or xdotool as fallback"""
+        if self._xdo is not None:
+            return self._xdo.get_focused_window()
+        
+        result = subprocess.run(
+            ['xdotool', 'getwindowfocus'], 
+            capture_output=True, text=True, timeout=5
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+        return None
+    
+    def _get_window_name(self, window_id: str) -> Optional[str]:
+        """Get the window title through xcffib or libxdo, or xdotool as fallback"""
+        # xcffib reports errors per request, preferred over Xlib behind libxdo
+        if self._xcb is not None:
+            return self._xcb.get_window_name(window_id)
+        if self._xdo is not None:
+            return self._xdo.get_window_name(window_id)
+        
+        result = subprocess.run(
+            ['xdotool', 'getwindowname', window_id],
+            capture_output=True, text=True, timeout=5
+        )
+        if result.returncode == 0:
+            return result.stdout.strip()
+        return None
+    
+    def _get_window_geometry(self, window_id: str) -> Optional[Tuple[int, int, int, int]]:
+        """Get window geometry (x, y, width, height) through xcffib or libxdo, or xdotool as fallback"""
+        # xcffib reports errors per request, preferred over Xlib behind libxdo
+        for backend in (self._xcb, self._xdo):
+            if backend is not None:
+                geometry = backend.get_window_geometry(window_id)
+                logger.debug("Window geometry: %s", geometry)
+                return geometry
         
         try:
-            # Get window position
             geometry_result = subprocess.run(
                 ['xdotool', 'getwindowgeometry', '--shell', window_id],
                 capture_output=True, text=True, timeout=5
             )
-            
-            offset_x, offset_y = 0, 0
-            if geometry_result.returncode == 0:
-                # Parse the output to get window position
-                for line in geometry_result.stdout.split('\n'):
-                    if line.startswith('X='):
-                        offset_x = int(line.split('=')[1])
-                    elif line.startswith('Y='):
-                        offset_y = int(line.split('=')[1])
-                logger.debug(f"Window position: ({offset_x}, {offset_y})")
-            
+        except Exception as e:
+            logger.debug("Failed to get geometry of window %s: %s", window_id, e)
+            return None
+        
+        if geometry_result.returncode != 0:
+            return None
+        
+        # Parse the output to get window position and size
+        values = {}
+        for line in geometry_result.stdout.split('\n'):
+            key, sep, value = line.partition('=')
+            if sep and key in ('X', 'Y', 'WIDTH', 'HEIGHT'):
+                values[key] = int(value)
+        if len(values) != 4:
+            return None
+        
+        logger.debug(
+            "Window geometry: (%s, %s, %s, %s)",
+            values['X'], values['Y'], values['WIDTH'], values['HEIGHT']
+        )
+        return (values['X'], values['Y'], values['WIDTH'], values['HEIGHT'])
+    
+    def _grab_with_mss(self, x: int, y: int, width: int, height: int) -> Optional[Tuple[np.ndarray, int, int]]:
+        """
+        Grab a screen region through the persistent mss (XShm) connection
+        
+        The returned frame is a buffer reused by the next grab of the same size,
+        callers that keep it across captures must copy it.
+        """
+        try:
+            raw = self._sct.grab({'left': x, 'top': y, 'width': width, 'height': height})
+        except Exception as e:
+            logger.debug("mss grab failed: %s", e)
+            return None
+        
+        # BGRA view over the shared memory image, no copy
+        bgra = np.asarray(raw)
+        shape = (raw.height, raw.width, 3)
+        if self._frame_buf is None or self._frame_buf.shape != shape:
+            self._frame_buf = np.empty(shape, dtype=np.uint8)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self._frame_buf)
+        return (self._frame_buf, x, y)
+    
+    def _temp_path(self, method: str, suffix: str) -> str:
+        """
+        Get the persistent temporary file path of a capture method
+        
+        Files live in a directory created once with mkdtemp, so only this user
+        can create or replace them by name. The directory is removed when the
+        process exits.
+        """
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix='screen_capture_', dir=TEMP_DIR)
+        return os.path.join(self._temp_dir, f'{method}{suffix}')
+    
+    def _fresh_temp_path(self, method: str, suffix: str) -> str:
+        """
+        Get the temporary file path of a capture method with its previous capture removed
+        
+        A capture command exiting 0 without writing would otherwise leave the
+        previous screenshot to be read, and a button found in it clicked again.
+        """
+        path = self._temp_path(method, suffix)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        return path
+    
+    def _cleanup_temp_files(self) -> None:
+        """Remove the temporary directory and the capture files in it"""
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+    
+    def _capture_window_with_xwd(
+        self, window_id: str, offset_x: int, offset_y: int
+    ) -> Optional[Tuple[np.ndarray, int, int]]:
+        """Capture a single window with xwd, parsing the dump directly"""
+        xwd_filename = self._fresh_temp_path('xwd', '.xwd')
+        
+        try:
             # Capture window with xwd
-            logger.debug(f"Capturing window with xwd to {xwd_filename}")
+            logger.debug("Capturing window with xwd to %s", xwd_filename)
             xwd_result = subprocess.run(
                 ['xwd', '-id', window_id, '-silent', '-out', xwd_filename],
                 capture_output=True, timeout=10
             )
             
             if xwd_result.returncode == 0 and os.path.exists(xwd_filename):
-                logger.debug("XWD capture successful, converting to PNG")
-                # Convert xwd to png using ImageMagick
-                convert_result = subprocess.run(
-                    ['convert', xwd_filename, png_filename],
-                    capture_output=True, timeout=10
-                )
-                
-                if convert_result.returncode == 0 and os.path.exists(png_filename):
-                    logger.debug(f"Conversion successful, reading image from {png_filename}")
-                    # Read the image
-                    frame = cv2.imread(png_filename)
-                    # Clean up temporary files
-                    os.unlink(xwd_filename)
-                    os.unlink(png_filename)
+                logger.debug("XWD capture successful, parsing pixel data")
+                frame = read_xwd(xwd_filename)
+                if frame is not None:
                     logger.debug("Successfully captured VSCode window")
                     return (frame, offset_x, offset_y)
-                else:
-                    logger.debug(f"Image conversion failed with return code: {convert_result.returncode}")
-        
-            # Clean up temporary files if they exist
-            if os.path.exists(xwd_filename):
-                os.unlink(xwd_filename)
-            if os.path.exists(png_filename):
-                os.unlink(png_filename)
-                
         except Exception as e:
-            # Clean up temporary files if they exist
-            if os.path.exists(xwd_filename):
-                os.unlink(xwd_filename)
-            if os.path.exists(png_filename):
-                os.unlink(png_filename)
-            logger.debug(f"Failed to capture window {window_id}: {e}")
+            logger.debug("Failed to capture window %s: %s", window_id, e)
             
         return None
     
     def _capture_with_scrot(self) -> Optional[Tuple[np.ndarray, int, int]]:
         """Capture screen using scrot command"""
         logger.debug("Attempting to capture screen with scrot")
-        tmp_file = create_temp_file(suffix='.png', delete=False)
-        temp_filename = tmp_file.name
-        tmp_file.close()
-            
-        try:
-            result = subprocess.run(
-                ['scrot', temp_filename], 
-                capture_output=True, text=True, timeout=10
-            )
+        # scrot never overwrites, it would write to a "_000" suffixed name instead
+        temp_filename = self._fresh_temp_path('scrot', '.png')
             
-            if result.returncode == 0 and os.path.exists(temp_filename):
-                frame = cv2.imread(temp_filename)
-                os.unlink(temp_filename)
-                logger.debug("Successfully captured screen with scrot")
-                # Full screen capture, no offset
-                return (frame, 0, 0)
-            else:
-                # Clean up temp file if it exists
-                if os.path.exists(temp_filename):
-                    os.unlink(temp_filename)
-                logger.debug(f"Scrot failed with return code: {result.returncode}")
-                return None
-        except subprocess.TimeoutExpired:
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
-            raise
+        result = subprocess.run(
+            ['scrot', temp_filename], 
+            capture_output=True, text=True, timeout=10
+        )
+        
+        if result.returncode == 0 and os.path.exists(temp_filename):
+            frame = cv2.imread(temp_filename)
+            logger.debug("Successfully captured screen with scrot")
+            # Full screen capture, no offset
+            return (frame, 0, 0)
+        else:
+            logger.debug("Scrot failed with return code: %s", result.returncode)
+            return None
     
     def _capture_with_gnome_screenshot(self) -> Optional[Tuple[np.ndarray, int, int]]:
         """Capture screen using gnome-screenshot command"""
-        tmp_file = create_temp_file(suffix='.png', delete=False)
-        temp_filename = tmp_file.name
-        tmp_file.close()
+        temp_filename = self._fresh_temp_path('gnome_screenshot', '.png')
         
-        try:
-            result = subprocess.run(
-                ['gnome-screenshot', '-f', temp_filename], 
-                capture_output=True, text=True, timeout=10
-            )
-            
-            if result.returncode == 0 and os.path.exists(temp_filename):
-                frame = cv2.imread(temp_filename)
-                os.unlink(temp_filename)
-                # Full screen capture, no offset
-                return (frame, 0, 0)
-            else:
-                # Clean up temp file if it exists
-                if os.path.exists(temp_filename):
-                    os.unlink(temp_filename)
-                return None
-        except subprocess.TimeoutExpired:
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
-            raise
+        result = subprocess.run(
+            ['gnome-screenshot', '-f', temp_filename], 
+            capture_output=True, text=True, timeout=10
+        )
+        
+        if result.returncode == 0 and os.path.exists(temp_filename):
+            frame = cv2.imread(temp_filename)
+            # Full screen capture, no offset
+            return (frame, 0, 0)
+        else:
+            return None
     
     def _capture_with_xdotool(self) -> Optional[Tuple[np.ndarray, int, int]]:
         """Capture screen using xdotool and gnome-screenshot"""
-        tmp_file = create_temp_file(suffix='.png', delete=False)
-        temp_filename = tmp_file.name
-        tmp_file.close()
+        temp_filename = self._fresh_temp_path('xdotool', '.png')
             
-        try:
-            # Get active window information
+        # Get active window information
+        offset_x, offset_y = 0, 0
+        found_window = False
+        if self._xdo is not None:
+            window_id = self._xdo.get_active_window()
+            geometry = self._xdo.get_window_geometry(window_id) if window_id else None
+            if geometry is not None:
+                offset_x, offset_y = geometry[:2]
+                found_window = True
+        else:
             result = subprocess.run(
                 ['xdotool', 'getactivewindow', 'getwindowgeometry', '--shell'], 
                 capture_output=True, text=True, timeout=5
             )
-            
-            offset_x, offset_y = 0, 0
             if result.returncode == 0:
                 # Parse the output to get window position
                 for line in result.stdout.split('\n'):
@@ -301,28 +472,23 @@ class ScreenCapture:
                         offset_x = int(line.split('=')[1])
                     elif line.startswith('Y='):
                         offset_y = int(line.split('=')[1])
-                logger.debug(f"Window position: ({offset_x}, {offset_y})")
-                
-                # Capture only the active window
-                result = subprocess.run(
-                    ['gnome-screenshot', '-w', '-f', temp_filename],
-                    capture_output=True, text=True, timeout=10
-                )
-                
-                if result.returncode == 0 and os.path.exists(temp_filename):
-                    frame = cv2.imread(temp_filename)
-                    os.unlink(temp_filename)
-                    return (frame, offset_x, offset_y)
+                found_window = True
+        
+        if found_window:
+            logger.debug("Window position: (%s, %s)", offset_x, offset_y)
             
-            # Clean up temp file if it exists
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
-            # Full screen fallback
-            return None
-        except subprocess.TimeoutExpired:
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
-            raise
+            # Capture only the active window
+            result = subprocess.run(
+                ['gnome-screenshot', '-w', '-f', temp_filename],
+                capture_output=True, text=True, timeout=10
+            )
+            
+            if result.returncode == 0 and os.path.exists(temp_filename):
+                frame = cv2.imread(temp_filename)
+                return (frame, offset_x, offset_y)
+        
+        # Full screen fallback
+        return None
     
     def _capture_with_pyautogui(self) -> Optional[Tuple[np.ndarray, int, int]]:
         """Capture screen using pyautogui (may cause flickering)"""
@@ -7,13 +7,78 @@ Company: Navinfo
 """
 
 import cv2
+import functools
 import os
 import logging
 import numpy as np
-from typing import Optional, Tuple
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Coarse-to-fine search: templates are matched at 1/PYRAMID_SCALE first
+PYRAMID_SCALE = 4
+# Minimum side of a downscaled template for the coarse pass to be meaningful,
+# below it the coarse peak too often lands on unrelated text
+PYRAMID_MIN_TEMPLATE_SIDE = 16
+# Padding (pixels) around the scaled-up coarse hit for full resolution refinement
+PYRAMID_REFINE_PADDING = 8
+# Upper bound for concurrent template matching threads
+MAX_MATCH_WORKERS = 8
+# Padding (pixels) around the previous button line area searched before the full frame
+LINE_AREA_ROI_PADDING = 64
+# Upper bound for cached templates, each entry holds all data derived from one file
+TEMPLATE_CACHE_SIZE = 64
+
+
+class TemplateLevels(NamedTuple):
+    """A grayscale template, its coarse pyramid level and their norms"""
+    full: np.ndarray
+    full_norm: float
+    # None when the template is too small to downscale
+    small: Optional[np.ndarray]
+    small_norm: float
+
+
+def _compute_template_norm(template: np.ndarray) -> float:
+    """Compute the norm of the mean-subtracted template"""
+    template = template.astype(np.float64)
+    return float(np.sqrt(((template - template.mean()) ** 2).sum()))
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _read_template_cached(template_path: str) -> TemplateLevels:
+    """
+    Read a template file and derive its coarse pyramid level, cached per path
+    
+    Failures raise instead of returning None, lru_cache does not cache
+    exceptions so a template file added later is still picked up.
+    
+    Raises:
+        FileNotFoundError: If the template file does not exist
+        ValueError: If the template file cannot be decoded
+    """
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template file does not exist: {template_path}")
+        
+    # Match in single channel, UI glyphs are high-contrast enough for grayscale.
+    # Decoding straight to grayscale also keeps a third of the memory cached.
+    template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
+    if template is None:
+        raise ValueError(f"Cannot read template file: {template_path}")
+    
+    h, w = template.shape[:2]
+    small_h, small_w = h // PYRAMID_SCALE, w // PYRAMID_SCALE
+    if min(small_h, small_w) < PYRAMID_MIN_TEMPLATE_SIDE:
+        # Too few pixels left to localize reliably, match at full resolution only
+        small, small_norm = None, 0.0
+    else:
+        small = cv2.resize(template, (small_w, small_h), interpolation=cv2.INTER_AREA)
+        small_norm = _compute_template_norm(small)
+    logger.debug("Cached template: %s", template_path)
+    return TemplateLevels(template, _compute_template_norm(template), small, small_norm)
+
 
 class TemplateMatcher:
     def __init__(self, config: dict, threshold: Optional[float] = None):
@@ -24,52 +89,382 @@ class TemplateMatcher:
         else:
             self.threshold = threshold
             
-        # Template cache to avoid reloading templates
-        self.template_cache = {}
-        logger.debug(f"TemplateMatcher initialized with threshold: {self.threshold}")
+        # Minimum number of same-size templates for sharing image window norms
+        self.shared_norm_min_templates = (
+            config.get('shared_norm_min_templates', 3) if config else 3
+        )
+        # A template scoring at least this ends the search, the rest is skipped
+        self.early_exit_threshold = (
+            config.get('early_exit_threshold', 0.95) if config else 0.95
+        )
+        # Successful matches per template path, used to try likely winners first
+        self._template_hits: Counter = Counter()
+        # Last found button line area (x, y, width, height), searched first next time
+        self._last_line_area: Optional[Tuple[int, int, int, int]] = None
+        # Reusable matchTemplate result and scratch buffers, the latest shape per owner
+        self._buffers: Dict[object, np.ndarray] = {}
+        # Templates are matched concurrently, OpenCV releases the GIL in matchTemplate.
+        # Keep OpenCV single-threaded so its own pool does not fight ours.
+        cv2.setNumThreads(1)
+        self._pool = ThreadPoolExecutor(max_workers=min(MAX_MATCH_WORKERS, os.cpu_count() or 1))
+        logger.debug("TemplateMatcher initialized with threshold: %s", self.threshold)
     
-    def _load_template(self, template_path: str) -> Optional[np.ndarray]:
-        """Load template from cache or file"""
-        logger.debug(f"Loading template: {template_path}")
-        if template_path in self.template_cache:
-            logger.debug(f"Loaded template from cache: {template_path}")
-            return self.template_cache[template_path]
-        
-        if not os.path.exists(template_path):
-            logger.debug(f"Template file does not exist: {template_path}")
+    def _load_template(self, template_path: str) -> Optional[TemplateLevels]:
+        """Load template from cache or file, None if it cannot be read"""
+        try:
+            return _read_template_cached(template_path)
+        except (FileNotFoundError, ValueError) as e:
+            logger.debug("%s", e)
             return None
-            
-        template = cv2.imread(template_path)
-        if template is None:
-            logger.debug(f"Cannot read template file: {template_path}")
+
+    @staticmethod
+    def _to_gray(frame: np.ndarray) -> np.ndarray:
+        """Convert a BGR/BGRA frame to a contiguous grayscale image"""
+        if frame.ndim == 2:
+            if not frame.flags['C_CONTIGUOUS']:
+                frame = np.ascontiguousarray(frame)
+            return frame
+        if frame.shape[2] == 4:
+            return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def _get_buffer(self, key: object, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        """
+        Get a reusable scratch buffer, allocating it on first use
+        
+        Reusing large buffers between frames avoids paying fresh allocations
+        and page faults on every match. Each owner keeps one buffer, replaced
+        when a different shape is requested, so memory stays bounded however
+        many image sizes are searched.
+        """
+        buf = self._buffers.get(key)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[key] = buf
+        return buf
+
+    def _compute_window_norms(
+        self, image: np.ndarray, template_shape: Tuple[int, int], search: str
+    ) -> np.ndarray:
+        """
+        Compute the norm of every mean-subtracted image window of a template size
+        
+        Uses float64 integral images (exact for 8-bit input). Flat windows get
+        an infinite norm so that dividing by it yields 0 instead of NaN.
+        Scratch buffers are owned per search and template size, so groups of
+        different sizes can run concurrently and each search keeps its own.
+        
+        Args:
+            image: Grayscale image to search
+            template_shape: Template size (h, w)
+            search: Search the image belongs to, see _find_best_match
+        
+        Returns:
+            float32 array with the shape of the matchTemplate result
+        """
+        h, w = template_shape
+        ii_shape = (image.shape[0] + 1, image.shape[1] + 1)
+        res_shape = (image.shape[0] - h + 1, image.shape[1] - w + 1)
+        template_shape = tuple(template_shape)
+        sum_ii = self._get_buffer(('integral_sum', search, template_shape), ii_shape, np.float64)
+        sqsum_ii = self._get_buffer(('integral_sqsum', search, template_shape), ii_shape, np.float64)
+        cv2.integral2(image, sum=sum_ii, sqsum=sqsum_ii, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        
+        win_sum = self._get_buffer(('window_sum', search, template_shape), res_shape, np.float64)
+        cv2.subtract(sum_ii[h:, w:], sum_ii[:-h, w:], dst=win_sum)
+        cv2.subtract(win_sum, sum_ii[h:, :-w], dst=win_sum)
+        cv2.add(win_sum, sum_ii[:-h, :-w], dst=win_sum)
+        win_sqsum = self._get_buffer(('window_sqsum', search, template_shape), res_shape, np.float64)
+        cv2.subtract(sqsum_ii[h:, w:], sqsum_ii[:-h, w:], dst=win_sqsum)
+        cv2.subtract(win_sqsum, sqsum_ii[h:, :-w], dst=win_sqsum)
+        cv2.add(win_sqsum, sqsum_ii[:-h, :-w], dst=win_sqsum)
+        
+        # Sum of squared deviations from the window mean
+        cv2.multiply(win_sum, win_sum, dst=win_sum)
+        cv2.scaleAdd(win_sum, -1.0 / (h * w), win_sqsum, dst=win_sqsum)
+        np.maximum(win_sqsum, 0, out=win_sqsum)
+        norms = self._get_buffer(('window_norms', search, template_shape), res_shape)
+        np.sqrt(win_sqsum, out=norms, casting='same_kind')
+        norms[norms == 0] = np.inf
+        return norms
+
+    def _match_template(
+        self, image: np.ndarray, template: np.ndarray, buffer_key: Tuple,
+        window_norms: Optional[np.ndarray] = None, template_norm: float = 0.0
+    ) -> np.ndarray:
+        """
+        Run normalized correlation coefficient matching into a reused result buffer
+        
+        Buffers are owned per template and role (buffer_key) so that templates
+        matched concurrently on the thread pool never share an output array, and
+        each search keeps a buffer of its own result size.
+        
+        Args:
+            image: Grayscale image to search
+            template: Grayscale template
+            buffer_key: Owner of the result buffer
+            window_norms: Precomputed image window norms shared by templates of
+                the same size, see _compute_window_norms. If None, OpenCV
+                normalizes the result itself.
+            template_norm: Precomputed norm of the mean-subtracted template,
+                used with window_norms
+        """
+        result_shape = (image.shape[0] - template.shape[0] + 1,
+                        image.shape[1] - template.shape[1] + 1)
+        if result_shape[0] <= 0 or result_shape[1] <= 0:
+            # Template larger than image, let OpenCV raise its usual error
+            return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+
+        buf = self._get_buffer(buffer_key, result_shape)
+        if window_norms is None:
+            return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED, result=buf)
+        
+        # Unnormalized correlation, normalized with the shared window norms
+        res = cv2.matchTemplate(image, template, cv2.TM_CCOEFF, result=buf)
+        if template_norm == 0:
+            # Flat template, OpenCV scores every position as a perfect match
+            res.fill(1)
+            return res
+        cv2.divide(res, window_norms, dst=res, scale=1.0 / template_norm)
+        # Values clearly above 1 are rounding noise on near-flat windows,
+        # OpenCV's own normalization scores them 0 as well
+        res[np.abs(res) > 1.125] = 0
+        np.clip(res, -1, 1, out=res)
+        return res
+
+    def _match_single(
+        self, image: np.ndarray, template: np.ndarray, template_path: str, kind: str,
+        is_coarse: bool, window_norms: Optional[np.ndarray], template_norm: float, search: str
+    ) -> Optional[Tuple[float, Tuple[int, int]]]:
+        """
+        Match one template against an image
+        
+        Returns:
+            Tuple of (matching degree, top-left position) or None if OpenCV failed
+        """
+        # Perform template matching
+        try:
+            buffer_key = (template_path, search, 'coarse' if is_coarse else 'full')
+            res = self._match_template(image, template, buffer_key, window_norms, template_norm)
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        except cv2.error as e:
+            logger.error(
+                "OpenCV error during %s template matching with %s: %s", kind.lower(), template_path, e
+            )
             return None
+        
+        logger.debug(
+            "%s template %s %smatching result: %.4f at %s",
+            kind, template_path, 'coarse ' if is_coarse else '', max_val, max_loc
+        )
+        return max_val, max_loc
+
+    def _match_group(
+        self, jobs: list, kind: str, share_norms: bool, search: str
+    ) -> List[Tuple[str, Tuple[int, int], bool, float, Tuple[int, int]]]:
+        """
+        Match a group of templates against the same image on one pool thread
+        
+        Templates are tried in the given order and the group stops early once
+        one scores at least early_exit_threshold.
+        
+        Args:
+            jobs: Match jobs as built by _find_best_match
+            kind: Template kind used in log messages
+            share_norms: All templates have the same size, compute the image
+                window norms once for the whole group
+            search: Search the image belongs to, see _find_best_match
             
-        # Cache the template
-        self.template_cache[template_path] = template
-        logger.debug(f"Cached template: {template_path}")
-        return template
+        Returns:
+            List of (template path, template size (h, w), is coarse, matching degree,
+            top-left position) of the templates matched
+        """
+        window_norms = None
+        if share_norms:
+            _, _, match_image, match_template, _, _ = jobs[0]
+            window_norms = self._compute_window_norms(match_image, match_template.shape, search)
+        
+        results = []
+        for template_path, template, match_image, match_template, is_coarse, template_norm in jobs:
+            result = self._match_single(
+                match_image, match_template, template_path, kind, is_coarse, window_norms, template_norm, search
+            )
+            if result is None:
+                continue
+            max_val, max_loc = result
+            results.append((template_path, template.shape[:2], is_coarse, max_val, max_loc))
+            if max_val >= self.early_exit_threshold:
+                break
+        return results
+
+    def _find_best_match(
+        self, image: np.ndarray, template_paths: List[str], kind: str, search: str,
+        use_pyramid: bool = True
+    ) -> Tuple[float, Optional[str], Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        Find the best matching template within an image, coarse-to-fine
+        
+        Templates are matched concurrently on the thread pool. Templates large
+        enough for the pyramid are first matched against the image downscaled
+        by PYRAMID_SCALE. Only the winning template is then refined at full
+        resolution in a small window around the coarse hit. If the refined
+        match stays below the threshold, the search is repeated at full
+        resolution so a misleading coarse peak cannot hide the real match.
+        
+        When enough templates share the same size, they run as one pool job
+        that computes the image window norms once from integral images and
+        shares them instead of OpenCV recomputing them for every template.
+        
+        Templates are submitted in order of past successful matches. Once one
+        scores at least early_exit_threshold, templates not yet started are
+        skipped.
+        
+        Args:
+            image: Grayscale image to search
+            template_paths: Template image paths to try
+            kind: Template kind used in log messages ("Line" or "Button")
+            search: Which search this is ("frame", "roi" or "area"), scratch buffers
+                are kept per search so alternating image sizes do not reallocate them
+            use_pyramid: Whether templates large enough may be matched coarse-to-fine
+            
+        Returns:
+            Tuple of (best matching degree, template path, top-left position, template size (h, w))
+        """
+        best_val = -1
+        best_match = None
+        best_pos = None
+        best_template_size = None
+        best_is_coarse = False
+        image_small = None
+        
+        # Try the usually winning templates first so the early exit triggers sooner,
+        # the stable sort keeps config order among equals
+        template_paths = sorted(template_paths, key=lambda path: -self._template_hits[path])
+        
+        # (path, full size template, image to search, template to match, is coarse, template norm)
+        jobs = []
+        for template_path in template_paths:
+            logger.debug("Processing %s template: %s", kind.lower(), template_path)
+            levels = self._load_template(template_path)
+                
+            if levels is None:
+                logger.debug("Skipping template %s because it could not be loaded", template_path)
+                continue
+                
+            template, template_small = levels.full, levels.small
+            logger.debug("%s template shape: %s", kind, template.shape)
+            if not use_pyramid:
+                template_small = None
+            if template_small is not None and image_small is None:
+                image_small = cv2.pyrDown(cv2.pyrDown(image))
+            if (template_small is not None
+                    and image_small.shape[0] >= template_small.shape[0]
+                    and image_small.shape[1] >= template_small.shape[1]):
+                jobs.append((template_path, template, image_small, template_small, True, levels.small_norm))
+            else:
+                jobs.append((template_path, template, image, template, False, levels.full_norm))
+        
+        # Group templates of the same size on the same image
+        groups = {}
+        for job in jobs:
+            _, _, _, match_template, is_coarse, _ = job
+            groups.setdefault((is_coarse, match_template.shape), []).append(job)
+        
+        futures = []
+        for group in groups.values():
+            if len(group) >= self.shared_norm_min_templates:
+                futures.append(self._pool.submit(self._match_group, group, kind, True, search))
+            else:
+                futures.extend(self._pool.submit(self._match_group, [job], kind, False, search) for job in group)
+        
+        for future in as_completed(futures):
+            for template_path, template_size, is_coarse, max_val, max_loc in future.result():
+                # Check if this is a better match
+                if max_val > best_val:
+                    best_val = max_val
+                    best_match = template_path
+                    best_pos = max_loc
+                    best_template_size = template_size  # (height, width)
+                    best_is_coarse = is_coarse
+                    logger.debug("New best %s match found: %.4f with %s", kind.lower(), best_val, best_match)
+            
+            if best_val >= self.early_exit_threshold:
+                skipped = sum(future.cancel() for future in futures)
+                logger.debug("Early exit on %s, skipped %d jobs", best_match, skipped)
+                # Jobs already running still write into buffers reused by the next call
+                wait(futures)
+                break
+        
+        if best_is_coarse:
+            best_val, best_pos = self._refine_match(image, best_match, best_pos, search)
+            if best_val < self.threshold:
+                logger.debug("Refined %s match below threshold, searching at full resolution", kind.lower())
+                return self._find_best_match(image, template_paths, kind, search, use_pyramid=False)
+        
+        if best_match is not None and best_val >= self.threshold:
+            self._template_hits[best_match] += 1
+        
+        return best_val, best_match, best_pos, best_template_size
+
+    def _refine_match(
+        self, image: np.ndarray, template_path: str, coarse_pos: Tuple[int, int], search: str
+    ) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """
+        Refine a coarse pyramid hit by matching at full resolution around it
+        
+        Args:
+            image: Full resolution grayscale image
+            template_path: Path of the template that won the coarse pass
+            coarse_pos: Top-left position of the coarse hit in pyramid coordinates
+            search: Search the image belongs to, see _find_best_match
+            
+        Returns:
+            Tuple of (matching degree, top-left position in image coordinates)
+        """
+        template = self._load_template(template_path).full
+        th, tw = template.shape[:2]
+        image_h, image_w = image.shape[:2]
+        
+        # Window covering the template at the scaled-up position plus padding
+        cx, cy = coarse_pos[0] * PYRAMID_SCALE, coarse_pos[1] * PYRAMID_SCALE
+        x_start = max(0, min(cx - PYRAMID_REFINE_PADDING, image_w - tw))
+        y_start = max(0, min(cy - PYRAMID_REFINE_PADDING, image_h - th))
+        x_end = min(image_w, max(cx + tw + PYRAMID_REFINE_PADDING, x_start + tw))
+        y_end = min(image_h, max(cy + th + PYRAMID_REFINE_PADDING, y_start + th))
+        window = image[y_start:y_end, x_start:x_end]
+        
+        try:
+            res = self._match_template(window, template, (template_path, search, 'refine'))
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        except cv2.error as e:
+            logger.error("OpenCV error during refinement with %s: %s", template_path, e)
+            return -1, None
+        
+        pos = (x_start + max_loc[0], y_start + max_loc[1])
+        logger.debug("Refined template %s matching result: %.4f at %s", template_path, max_val, pos)
+        return max_val, pos
 
     def find_button_line_area(self, frame: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
         """
         Find button line area in screen screenshot using line templates
         
+        The button line rarely moves between frames, so the neighbourhood of
+        the last found area is searched first and the full frame only on a miss.
+        
         Args:
-            frame: Screen screenshot
+            frame: Screen screenshot (BGR or already converted grayscale)
             
         Returns:
             Button line area coordinates (x, y, width, height) or None if not found
         """
         logger.debug("Starting button line area detection")
-        best_match = None
-        best_val = -1
-        best_pos = None
-        best_template_size = None
+        frame = self._to_gray(frame)
         
         # Use line templates from config for initial matching
         line_templates = []
         if self.config and 'line_template_paths' in self.config:
             line_templates = self.config['line_template_paths']
-            logger.debug(f"Using {len(line_templates)} line templates for matching")
+            logger.debug("Using %s line templates for matching", len(line_templates))
         else:
             logger.error("No line template paths found in config file")
             return None
@@ -78,32 +473,29 @@ class TemplateMatcher:
             logger.error("Line template paths list is empty")
             return None
             
-        for template_path in line_templates:
-            logger.debug(f"Processing template: {template_path}")
-            template = self._load_template(template_path)
-                
-            if template is None:
-                logger.debug(f"Skipping template {template_path} because it could not be loaded")
-                continue
-                
-            logger.debug(f"Template shape: {template.shape}")
-            # Perform template matching
-            try:
-                res = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, max_loc = cv2.minMaxLoc(res)
-                
-                logger.debug(f"Template {template_path} matching result: {max_val:.4f} at {max_loc}")
-                
-                # Check if this is a better match
-                if max_val > best_val:
-                    best_val = max_val
-                    best_match = template_path
-                    best_pos = max_loc
-                    best_template_size = template.shape[:2]  # (height, width)
-                    logger.debug(f"New best match found: {best_val:.4f} with {best_match}")
-            except cv2.error as e:
-                logger.error(f"OpenCV error during template matching with {template_path}: {e}")
-                continue
+        best_val = -1
+        if self._last_line_area is not None:
+            # Search around the previous position first
+            x, y, w, h = self._last_line_area
+            x_start = max(0, x - LINE_AREA_ROI_PADDING)
+            y_start = max(0, y - LINE_AREA_ROI_PADDING)
+            roi = frame[y_start:y + h + LINE_AREA_ROI_PADDING, x_start:x + w + LINE_AREA_ROI_PADDING]
+            if roi.shape[0] >= h and roi.shape[1] >= w:
+                best_val, best_match, best_pos, best_template_size = self._find_best_match(
+                    roi, line_templates, "Line", "roi"
+                )
+            if best_val >= self.threshold:
+                best_pos = (best_pos[0] + x_start, best_pos[1] + y_start)
+            else:
+                logger.debug(
+                    "Button line area not found near %s, searching the full frame", self._last_line_area
+                )
+                self._last_line_area = None
+        
+        if best_val < self.threshold:
+            best_val, best_match, best_pos, best_template_size = self._find_best_match(
+                frame, line_templates, "Line", "frame"
+            )
         
         # Check if best match exceeds threshold
         if best_val >= self.threshold:
@@ -111,28 +503,29 @@ class TemplateMatcher:
             top_left = best_pos
             h, w = best_template_size
             logger.info(
-                f"Found LINGMA button line area using template {best_match} "
-                f"at position: ({top_left[0]}, {top_left[1]}, {w}, {h}), "
-                f"matching degree: {best_val:.2f}"
+                "Found LINGMA button line area using template %s "
+                "at position: (%s, %s, %s, %s), "
+                "matching degree: %.2f",
+                best_match, top_left[0], top_left[1], w, h, best_val
             )
-            return (top_left[0], top_left[1], w, h)
+            self._last_line_area = (top_left[0], top_left[1], w, h)
+            return self._last_line_area
         else:
             logger.debug(
-                f"Button line area not found, best matching degree: {best_val:.2f} "
-                f"(threshold: {self.threshold})"
+                "Button line area not found, best matching degree: %.2f "
+                "(threshold: %s)",
+                best_val, self.threshold
             )
             # Add more detailed debug information
-            logger.debug(f"Frame shape: {frame.shape}")
-            logger.debug(f"Number of templates tried: {len(line_templates)}")
-            for template_path in line_templates:
-                if os.path.exists(template_path):
-                    template = cv2.imread(template_path)
-                    if template is not None:
-                        logger.debug(f"Template {template_path} shape: {template.shape}")
-                    else:
-                        logger.debug(f"Could not load template {template_path}")
-                else:
-                    logger.debug(f"Template file not found: {template_path}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Frame shape: %s", frame.shape)
+                logger.debug("Number of templates tried: %d", len(line_templates))
+                for template_path in line_templates:
+                    levels = self._load_template(template_path)
+                    logger.debug(
+                        "Template %s shape: %s", template_path,
+                        levels.full.shape if levels is not None else "not loaded"
+                    )
             return None
     
     def find_continue_button_in_area(self, frame: np.ndarray, area_x: int, area_y: int, 
@@ -141,7 +534,7 @@ class TemplateMatcher:
         Find continue button within a specified area using button templates
         
         Args:
-            frame: Screen screenshot
+            frame: Screen screenshot (BGR or already converted grayscale)
             area_x: Search area top-left x coordinate
             area_y: Search area top-left y coordinate
             area_w: Search area width
@@ -150,17 +543,14 @@ class TemplateMatcher:
         Returns:
             Button coordinates (x, y, width, height) or None if not found
         """
-        logger.debug(f"Starting continue button detection in area: ({area_x}, {area_y}, {area_w}, {area_h})")
-        best_val = -1
-        best_pos = None
-        best_template_size = None
-        best_match = None
-        
+        logger.debug(
+            "Starting continue button detection in area: (%s, %s, %s, %s)", area_x, area_y, area_w, area_h
+        )
         # Use button templates from config for finding the actual button
         button_templates = []
         if self.config and 'button_template_paths' in self.config:
             button_templates = self.config['button_template_paths']
-            logger.debug(f"Using {len(button_templates)} button templates for matching")
+            logger.debug("Using %s button templates for matching", len(button_templates))
         else:
             logger.error("No button template paths found in config file")
             return None
@@ -176,38 +566,19 @@ class TemplateMatcher:
         x_end = min(frame.shape[1], area_x + area_w + padding)
         y_end = min(frame.shape[0], area_y + area_h + padding)
         
+        # Slicing yields a view, matchTemplate handles the strided ROI directly
         search_area = frame[y_start:y_end, x_start:x_end]
+        if search_area.ndim == 3:
+            search_area = self._to_gray(search_area)
         logger.debug(
-            f"Search area shape: {search_area.shape} "
-            f"(original area: ({area_x}, {area_y}, {area_w}, {area_h}))"
+            "Search area shape: %s "
+            "(original area: (%s, %s, %s, %s))",
+            search_area.shape, area_x, area_y, area_w, area_h
         )
         
-        for template_path in button_templates:
-            logger.debug(f"Processing button template: {template_path}")
-            template = self._load_template(template_path)
-                
-            if template is None:
-                logger.debug(f"Skipping template {template_path} because it could not be loaded")
-                continue
-                
-            logger.debug(f"Button template shape: {template.shape}")
-            # Perform template matching
-            try:
-                res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, max_loc = cv2.minMaxLoc(res)
-                
-                logger.debug(f"Button template {template_path} matching result: {max_val:.4f} at {max_loc}")
-                
-                # Check if this is a better match
-                if max_val > best_val:
-                    best_val = max_val
-                    best_match = template_path
-                    best_pos = max_loc
-                    best_template_size = template.shape[:2]  # (height, width)
-                    logger.debug(f"New best button match found: {best_val:.4f} with {best_match}")
-            except cv2.error as e:
-                logger.error(f"OpenCV error during button template matching with {template_path}: {e}")
-                continue
+        best_val, best_match, best_pos, best_template_size = self._find_best_match(
+            search_area, button_templates, "Button", "area"
+        )
         
         # Check if best match exceeds threshold
         if best_val >= self.threshold:
@@ -220,28 +591,31 @@ class TemplateMatcher:
             abs_y = y_start + top_left[1]
             
             logger.info(
-                f"Found LINGMA Continue button using template {best_match} "
-                f"at position: ({abs_x}, {abs_y}, {template_w}, {template_h}), "
-                f"matching degree: {best_val:.2f}"
+                "Found LINGMA Continue button using template %s "
+                "at position: (%s, %s, %s, %s), "
+                "matching degree: %.2f",
+                best_match, abs_x, abs_y, template_w, template_h, best_val
             )
             return (abs_x, abs_y, template_w, template_h)
         else:
             logger.debug(
-                f"Continue button not found, best matching degree: {best_val:.2f} "
-                f"(threshold: {self.threshold})"
+                "Continue button not found, best matching degree: %.2f "
+                "(threshold: %s)",
+                best_val, self.threshold
             )
             # Add more detailed debug information
-            logger.debug(f"Search area coordinates: x_start={x_start}, y_start={y_start}, x_end={x_end}, y_end={y_end}")
-            logger.debug(f"Number of button templates tried: {len(button_templates)}")
-            for template_path in button_templates:
-                if os.path.exists(template_path):
-                    template = cv2.imread(template_path)
-                    if template is not None:
-                        logger.debug(f"Button template {template_path} shape: {template.shape}")
-                    else:
-                        logger.debug(f"Could not load button template {template_path}")
-                else:
-                    logger.debug(f"Button template file not found: {template_path}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Search area coordinates: x_start=%d, y_start=%d, x_end=%d, y_end=%d",
+                    x_start, y_start, x_end, y_end
+                )
+                logger.debug("Number of button templates tried: %d", len(button_templates))
+                for template_path in button_templates:
+                    levels = self._load_template(template_path)
+                    logger.debug(
+                        "Button template %s shape: %s", template_path,
+                        levels.full.shape if levels is not None else "not loaded"
+                    )
             return None
     
     def find_continue_button(self, frame: np.ndarray, offset_x: int = 0, offset_y: int = 0) -> Optional[Tuple[int, int, int, int]]:
@@ -256,26 +630,63 @@ class TemplateMatcher:
         Returns:
             Button coordinates (x, y, width, height) or None if not found
         """
-        logger.debug(f"Starting two-phase continue button detection with offset (x: {offset_x}, y: {offset_y})")
-        # Phase 1: Find button line area
-        button_line_area = self.find_button_line_area(frame)
-        if button_line_area is None:
-            logger.debug("Phase 1 (button line area detection) failed, cannot proceed to phase 2")
-            return None
+        return self.find_continue_button_and_line_area(frame, offset_x, offset_y)[0]
+    
+    def find_continue_button_and_line_area(
+        self, frame: np.ndarray, offset_x: int = 0, offset_y: int = 0
+    ) -> Tuple[Optional[Tuple[int, int, int, int]], Optional[Tuple[int, int, int, int]]]:
+        """
+        Find continue button and the button line area it was found in, in one pass
+        
+        While a button line area from a previous frame is known, phase 1 is
+        skipped and the button is searched in that area directly. Phase 1 only
+        runs again when the button is not found there.
             
-        logger.debug(f"Phase 1 successful, button line area: {button_line_area}")
-        # Phase 2: Find continue button within the button line area
-        x, y, w, h = button_line_area
-        button_rect = self.find_continue_button_in_area(frame, x, y, w, h)
+        Args:
+            frame: Screen screenshot
+            offset_x: Optional x offset of the screenshot relative to the full screen
+            offset_y: Optional y offset of the screenshot relative to the full screen
+
+        Returns:
+            Tuple of (button coordinates, button line area), each (x, y, width, height)
+            or None if not found
+        """
+        logger.debug(
+            "Starting two-phase continue button detection with offset (x: %s, y: %s)", offset_x, offset_y
+        )
+        # Convert once so both phases share the same grayscale frame
+        frame = self._to_gray(frame)
+        button_rect = None
+        button_line_area = self._last_line_area
+        if button_line_area is not None:
+            # The button line rarely moves, skip phase 1 and search the last found area
+            x, y, w, h = button_line_area
+            button_rect = self.find_continue_button_in_area(frame, x, y, w, h)
+            if button_rect is None:
+                logger.debug("Continue button not found in last button line area, running phase 1 again")
+        
+        if button_rect is None:
+            # Phase 1: Find button line area
+            button_line_area = self.find_button_line_area(frame)
+            if button_line_area is None:
+                logger.debug("Phase 1 (button line area detection) failed, cannot proceed to phase 2")
+                return None, None
+                
+            logger.debug("Phase 1 successful, button line area: %s", button_line_area)
+            # Phase 2: Find continue button within the button line area
+            x, y, w, h = button_line_area
+            button_rect = self.find_continue_button_in_area(frame, x, y, w, h)
+        
         if button_rect is None:
             logger.debug("Phase 2 (continue button detection within area) failed")
-        else:
+        elif logger.isEnabledFor(logging.DEBUG):
             # Adjust the button coordinates by the provided offset
             adjusted_rect = (button_rect[0] + offset_x, button_rect[1] + offset_y, button_rect[2], button_rect[3])
-            logger.debug(f"Phase 2 successful, continue button with offset: {adjusted_rect}")
-        return button_rect
+            logger.debug("Phase 2 successful, continue button with offset: %s", adjusted_rect)
+        return button_rect, button_line_area
         
     def clear_cache(self) -> None:
-        """Clear the template cache"""
-        self.template_cache.clear()
+        """Clear the template cache, shared by all matchers"""
+        _read_template_cached.cache_clear()
+        self._last_line_area = None
         logger.debug("Template cache cleared")
\ No newline at end of file
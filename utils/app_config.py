@@ -7,38 +7,101 @@ Author: Stephen Chen
 Company: Navinfo
 """
 
+import atexit
 import json
 import logging
-import logging.handlers
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
 from utils.common_utils import ensure_directory_exists
 
 CONFIG_PATH = 'config.json'
 logger = logging.getLogger(__name__)
 
+# Environment variables overriding configuration keys, with their value parsers
+ENV_OVERRIDES = {
+    'LINGMA_THRESHOLD': ('threshold', float),
+    'LINGMA_INTERVAL': ('default_interval', int),
+    'LINGMA_LOG_FILE': ('log_file', str),
+    'LINGMA_DEBUG': ('debug_mode', lambda value: value.strip().lower() in ('1', 'true', 'yes', 'on')),
+}
+# When all of these are set the configuration file is not read at all
+ENV_REQUIRED = ('LINGMA_THRESHOLD', 'LINGMA_INTERVAL', 'LINGMA_LOG_FILE')
+# Configuration used under the environment overrides when the file is skipped
+ENV_CONFIG_DEFAULTS: Dict[str, Any] = {
+    'line_template_paths': [
+        'templates/continue_button_line_light.png',
+        'templates/continue_button_line_dark.png',
+    ],
+    'button_template_paths': [
+        'templates/continue_button_light.png',
+        'templates/continue_button_dark.png',
+    ],
+}
 
-def load_config() -> Optional[Dict[str, Any]]:
-    """Load configuration from JSON file."""
-    config_path = CONFIG_PATH
-    try:
-        with open(config_path, 'r') as config_file:
-            return json.load(config_file)
-    except Exception as e:
-        logging.getLogger(__name__).error(f"Failed to load config file {config_path}: {e}")
-        return None
+# Parsed configuration keyed by (path, mtime in ns, size), reused until the file changes
+_CACHE: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+_CACHE_LOCK = threading.Lock()
 
+# Buffer in front of the log file handler, set up by setup_logging
+_file_buffer: Optional[logging.Handler] = None
 
-def setup_app_config():
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that formats the date and time once per second"""
+
+    def __init__(self, fmt: str, datefmt: str):
+        super().__init__(fmt, datefmt)
+        # (whole second, formatted date and time), replaced as one tuple so
+        # handlers on other threads never see a half updated cache
+        self._time_cache: Tuple[int, str] = (-1, '')
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        second = int(record.created)
+        cached_second, cached_time = self._time_cache
+        if second != cached_second:
+            cached_time = time.strftime(datefmt or self.datefmt, self.converter(record.created))
+            self._time_cache = (second, cached_time)
+        # Keep the milliseconds of the default asctime format
+        return '%s,%03d' % (cached_time, record.msecs)
+
+
+def load_config() -> Optional[Dict[str, Any]]:
     """
-    Setup both configuration and logging in one function.
+    Load configuration from JSON file.
+    
+    The parsed configuration is cached until the file's modification time or
+    size changes, callers must not modify the returned dictionary.
     
     Returns:
-        Configuration dictionary
+        Configuration dictionary, or None if the file is missing or invalid
     """
-    config = load_config()
-    
-    # Setup logging
+    try:
+        st = os.stat(CONFIG_PATH)
+        key = (CONFIG_PATH, st.st_mtime_ns, st.st_size)
+        with _CACHE_LOCK:
+            config = _CACHE.get(key)
+            if config is None:
+                with open(CONFIG_PATH, 'rb') as config_file:
+                    config = json.loads(config_file.read())
+                # Only the current version of the file is worth keeping
+                _CACHE.clear()
+                _CACHE[key] = config
+            return config
+    except FileNotFoundError:
+        return None
+    # ValueError covers json.JSONDecodeError and bytes that are not valid UTF-8
+    except (OSError, ValueError) as e:
+        logger.error("Failed to load config file %s: %s", CONFIG_PATH, e)
+        return None
+
+
+def setup_logging(config: Optional[Dict[str, Any]]) -> None:
+    """Setup logging configuration with rotation"""
     # Check if LOG_LEVEL environment variable is set
     log_level_str = os.environ.get('LOG_LEVEL', '').upper()
     if not log_level_str:
@@ -47,32 +110,105 @@ def setup_app_config():
     log_level = getattr(logging, log_level_str.upper(), logging.INFO)
     
     log_file = config.get('log_file', '/tmp/vscode_auto_continue.log') if config else '/tmp/vscode_auto_continue.log'
-    max_bytes = config.get('max_log_size', 10485760) if config else 10485760
+    max_bytes = config.get('max_log_size', 10485760) if config else 10485760  # Default 10MB
     backup_count = config.get('backup_count', 5) if config else 5
     
+    # Create directory for log file if it doesn't exist, fall back to /tmp
     log_dir = os.path.dirname(log_file)
+    log_dir_error = None
     if log_dir:
         try:
             ensure_directory_exists(log_dir)
-        except Exception:
+        except Exception as e:
             log_file = '/tmp/vscode_auto_continue.log'
+            log_dir_error = e
     
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    buffer_capacity = config.get('log_buffer_capacity', 64) if config else 64
+    
+    formatter = _CachedTimeFormatter(LOG_FORMAT, LOG_DATE_FORMAT)
+    # The format uses none of the thread and process fields, skip filling them in
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
+    # Write out what the previous setup still buffers before replacing it
+    flush_logs()
     root_logger.handlers.clear()
     
-    file_handler = logging.handlers.RotatingFileHandler(
+    # Only needed for the file handler, keep it off the import path
+    from utils.log_handlers import BatchingMemoryHandler, SizeTrackingRotatingFileHandler
+    file_handler = SizeTrackingRotatingFileHandler(
         log_file, maxBytes=max_bytes, backupCount=backup_count
     )
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
+    # Buffer file records and write each batch with one flush, errors trigger an immediate flush
+    global _file_buffer
+    _file_buffer = BatchingMemoryHandler(
+        capacity=buffer_capacity, flushLevel=logging.ERROR, target=file_handler, flushOnClose=True
+    )
+    root_logger.addHandler(_file_buffer)
     
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     root_logger.addHandler(console_handler)
     
-    logging.getLogger(__name__).debug(f"Logging setup complete with level: {log_level_str}")
-    logging.getLogger(__name__).debug(f"Using config file: {CONFIG_PATH}")
+    if log_dir_error is not None:
+        logger.warning("Could not create log directory %s: %s. Falling back to /tmp", log_dir, log_dir_error)
+    logger.debug("Logging setup complete with level: %s", log_level_str)
+
+
+def flush_logs() -> None:
+    """Write buffered log records to the log file"""
+    if _file_buffer is not None:
+        _file_buffer.flush()
+
+
+atexit.register(flush_logs)
+
+
+def load_env_overrides() -> Dict[str, Any]:
+    """
+    Read configuration overrides from LINGMA_* environment variables
+    
+    Returns:
+        Configuration keys and values of the set variables, invalid values are skipped
+    """
+    overrides = {}
+    for name, (key, parse) in ENV_OVERRIDES.items():
+        value = os.environ.get(name)
+        if value is None:
+            continue
+        try:
+            overrides[key] = parse(value)
+        except ValueError:
+            logger.warning("Ignoring invalid value %r of environment variable %s", value, name)
+    return overrides
+
+
+def setup_app_config():
+    """
+    Setup both configuration and logging in one function.
+    
+    Environment overrides take precedence over the configuration file, which is
+    not read when all of ENV_REQUIRED are set.
+    
+    Returns:
+        Configuration dictionary
+    """
+    overrides = load_env_overrides()
+    required_keys = [ENV_OVERRIDES[name][0] for name in ENV_REQUIRED]
+    if all(key in overrides for key in required_keys):
+        config = {**ENV_CONFIG_DEFAULTS, **overrides}
+        setup_logging(config)
+        logger.debug("Using configuration from environment variables")
+        return config
+    
+    config = load_config()
+    if overrides:
+        # The loaded dictionary is cached and shared, override on a copy
+        config = {**(config or {}), **overrides}
+    setup_logging(config)
+    logger.debug("Using config file: %s", CONFIG_PATH)
     
-    return config
\ No newline at end of file
+    return config
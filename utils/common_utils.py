@@ -13,6 +13,9 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Directories already created or found to exist, checked without touching the filesystem
+_ensured_directories = set()
+
 
 def ensure_directory_exists(
     directory_path: str, 
@@ -21,6 +24,9 @@ def ensure_directory_exists(
     """
     Ensure a directory exists, creating it if necessary.
     
+    Directories are remembered once they exist, later calls for the same
+    path return without a filesystem call.
+    
     Args:
         directory_path: Path to the directory to ensure exists
         fallback_path: Fallback path if the primary path cannot be created
@@ -29,25 +35,25 @@ def ensure_directory_exists(
         The path that was successfully created or already exists, 
         or the fallback path if provided and the primary path failed
     """
+    if directory_path in _ensured_directories:
+        return directory_path
     try:
-        if not os.path.exists(directory_path):
-            os.makedirs(directory_path)
-            logger.debug(f"Created directory: {directory_path}")
+        os.makedirs(directory_path, exist_ok=True)
+        _ensured_directories.add(directory_path)
+        logger.debug("Ensured directory exists: %s", directory_path)
         return directory_path
-    except Exception as e:
-        logger.error(f"Failed to create directory {directory_path}: {e}")
+    except OSError as e:
+        logger.error("Failed to create directory %s: %s", directory_path, e)
         
         if fallback_path:
             try:
-                if not os.path.exists(fallback_path):
-                    os.makedirs(fallback_path)
-                    logger.debug(
-                        f"Created fallback directory: {fallback_path}"
-                    )
+                os.makedirs(fallback_path, exist_ok=True)
+                _ensured_directories.add(fallback_path)
+                logger.debug("Ensured fallback directory exists: %s", fallback_path)
                 return fallback_path
-            except Exception as fallback_e:
+            except OSError as fallback_e:
                 logger.error(
-                    f"Failed to create fallback directory {fallback_path}: {fallback_e}"
+                    "Failed to create fallback directory %s: %s", fallback_path, fallback_e
                 )
                 raise
         raise
@@ -56,7 +62,8 @@ def ensure_directory_exists(
 def create_temp_file(
     suffix: str = '', 
     prefix: str = 'tmp', 
-    delete: bool = True
+    delete: bool = True,
+    dir: Optional[str] = None
 ) -> tempfile.NamedTemporaryFile:
     """
     Create a temporary file with consistent settings.
@@ -65,6 +72,7 @@ def create_temp_file(
         suffix: Suffix for the temporary file
         prefix: Prefix for the temporary file
         delete: Whether to delete the file when closed
+        dir: Directory to create the file in, system default if None
         
     Returns:
         A NamedTemporaryFile object
@@ -72,5 +80,6 @@ def create_temp_file(
     return tempfile.NamedTemporaryFile(
         suffix=suffix, 
         prefix=prefix, 
-        delete=delete
+        delete=delete,
+        dir=dir
     )
\ No newline at end of file
@@ -1,23 +1,12 @@
 #!/usr/bin/env python3
 """
 Configuration management module
+Kept for compatibility, configuration loading lives in utils.app_config
 
 Author: Stephen Chen
 Company: Navinfo
 """
 
-import json
-import logging
-from typing import Optional, Dict, Any
+from utils.app_config import CONFIG_PATH, load_config
 
-CONFIG_PATH = 'config.json'
-logger = logging.getLogger(__name__)
-
-def load_config() -> Optional[Dict[str, Any]]:
-    """Load configuration from JSON file."""
-    try:
-        with open(CONFIG_PATH, 'r') as config_file:
-            return json.load(config_file)
-    except Exception as e:
-        logger.error(f"Failed to load config file: {e}")
-        return None
\ No newline at end of file
+__all__ = ['CONFIG_PATH', 'load_config']
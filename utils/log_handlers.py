@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Log handlers module
+File handlers used by the logging setup
+
+Author: Stephen Chen
+Company: Navinfo
+"""
+
+import os
+from logging import LogRecord
+from typing import List
+from logging.handlers import MemoryHandler, RotatingFileHandler
+
+
+class SizeTrackingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that counts the characters it writes
+
+    The stock handler seeks to the end of the file and formats every record
+    twice to decide on rollover. This one formats once and compares a running
+    count against maxBytes instead. The count is in characters, like the
+    stock handler's message length, and does not see writes by other
+    processes to the same file. Like the stock handler, it never rolls over
+    a path that is not a regular file, such as /dev/stdout.
+
+    Records passed to handle_batch are flushed to the file once for the
+    whole batch instead of once per record.
+    """
+
+    def __init__(self, filename: str, mode: str = 'a', maxBytes: int = 0, backupCount: int = 0,
+                 encoding=None, delay: bool = False):
+        super().__init__(filename, mode, maxBytes, backupCount, encoding, delay)
+        # Devices and pipes must not be renamed, checked once at open time
+        self._rotatable = not os.path.exists(self.baseFilename) or os.path.isfile(self.baseFilename)
+        # Size of what is already in the file, read once at open time
+        try:
+            self._written = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._written = 0
+        # Set while handle_batch runs, records then stay in the stream buffer
+        self._defer_flush = False
+
+    def handle_batch(self, records: List[LogRecord]) -> None:
+        """
+        Handle records and flush the stream once after the last of them
+
+        Args:
+            records: Log records in the order they were logged
+        """
+        self._defer_flush = True
+        try:
+            for record in records:
+                self.handle(record)
+        finally:
+            self._defer_flush = False
+            self.flush()
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self._written = 0
+
+    def emit(self, record: LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            if self._rotatable and self.maxBytes > 0 and self._written + len(msg) >= self.maxBytes:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            if not self._defer_flush:
+                self.flush()
+            self._written += len(msg)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingMemoryHandler(MemoryHandler):
+    """
+    MemoryHandler that hands its buffer to the target as one batch
+
+    The stock handler passes buffered records to the target one at a time,
+    and the file handler flushes each of them. A target with handle_batch,
+    such as SizeTrackingRotatingFileHandler, gets the whole buffer instead
+    and flushes it to the file once.
+    """
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.target is None or not self.buffer:
+                return
+            handle_batch = getattr(self.target, 'handle_batch', None)
+            if handle_batch is not None:
+                handle_batch(self.buffer)
+            else:
+                for record in self.buffer:
+                    self.target.handle(record)
+            self.buffer = []
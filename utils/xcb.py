@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+XCB window queries module
+Looks windows up over one persistent X connection through xcffib,
+avoiding an xdotool process and X connection per query
+
+Author: Stephen Chen
+Company: Navinfo
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+try:
+    import xcffib
+    import xcffib.xproto
+except ImportError:
+    xcffib = None
+
+logger = logging.getLogger(__name__)
+
+# Longest property value read, in 32-bit units
+MAX_PROPERTY_LENGTH = 4096
+
+
+class XcbWindows:
+    """Window queries through a persistent xcffib connection"""
+
+    def __init__(self):
+        """
+        Connect to the X server named by $DISPLAY
+
+        Raises:
+            xcffib.ConnectionException: If the display cannot be opened
+        """
+        self._conn = xcffib.connect()
+        self._core = self._conn.core
+        self._root = self._conn.get_setup().roots[self._conn.pref_screen].root
+        self._client_list_atom = self._intern_atom('_NET_CLIENT_LIST')
+        self._net_wm_name_atom = self._intern_atom('_NET_WM_NAME')
+        self._utf8_string_atom = self._intern_atom('UTF8_STRING')
+
+    def close(self) -> None:
+        """Close the X connection"""
+        self._conn.disconnect()
+
+    def _intern_atom(self, name: str) -> int:
+        """Get the atom of a property or type name"""
+        return self._core.InternAtom(False, len(name), name).reply().atom
+
+    @staticmethod
+    def _replies(*cookies) -> Optional[list]:
+        """
+        Wait for the replies of already sent requests
+
+        Returns:
+            List of replies, or None if any request failed (e.g. the window is gone)
+        """
+        replies = []
+        failed = False
+        # Collect every reply even after an error so none is left pending
+        for cookie in cookies:
+            try:
+                replies.append(cookie.reply())
+            except xcffib.Error as e:
+                logger.debug("X request failed: %s", e)
+                failed = True
+        return None if failed else replies
+
+    def _request_name(self, window: int) -> tuple:
+        """Send the requests for a window title without waiting for the replies"""
+        return (
+            self._core.GetProperty(
+                False, window, self._net_wm_name_atom, self._utf8_string_atom, 0, MAX_PROPERTY_LENGTH
+            ),
+            self._core.GetProperty(
+                False, window, xcffib.xproto.Atom.WM_NAME,
+                xcffib.xproto.GetPropertyType.Any, 0, MAX_PROPERTY_LENGTH
+            ),
+        )
+
+    def _read_name(self, cookies: tuple) -> Optional[str]:
+        """Read a window title, preferring the EWMH UTF-8 name over WM_NAME"""
+        replies = self._replies(*cookies)
+        if replies is None:
+            return None
+        for reply in replies:
+            if reply.value_len:
+                return reply.value.raw.decode('utf-8', errors='replace')
+        return None
+
+    def find_windows_by_name(self, name: str) -> Optional[List[str]]:
+        """
+        Find top-level windows whose title contains name, like `xdotool search --name`
+
+        Only windows managed by the window manager (_NET_CLIENT_LIST) are searched.
+
+        Returns:
+            Matching window IDs, or None if the window manager does not publish
+            its client list and callers should fall back to the xdotool command
+        """
+        replies = self._replies(self._core.GetProperty(
+            False, self._root, self._client_list_atom, xcffib.xproto.Atom.WINDOW, 0, MAX_PROPERTY_LENGTH
+        ))
+        if replies is None or replies[0].format != 32:
+            return None
+
+        # Send all title requests before waiting, one round trip in total
+        requests = [(window, self._request_name(window)) for window in replies[0].value.to_atoms()]
+        matches = []
+        for window, cookies in requests:
+            title = self._read_name(cookies)
+            if title is not None and name in title:
+                matches.append(str(window))
+        return matches
+
+    def get_window_name(self, window_id: str) -> Optional[str]:
+        """Get the window title, like `xdotool getwindowname`"""
+        return self._read_name(self._request_name(int(window_id)))
+
+    def get_window_geometry(self, window_id: str) -> Optional[Tuple[int, int, int, int]]:
+        """Get window geometry (x, y, width, height), like `xdotool getwindowgeometry`"""
+        window = int(window_id)
+        replies = self._replies(
+            self._core.GetGeometry(window),
+            # Position of the window origin on the root window
+            self._core.TranslateCoordinates(window, self._root, 0, 0),
+        )
+        if replies is None:
+            return None
+        geometry, origin = replies
+        return (origin.dst_x, origin.dst_y, geometry.width, geometry.height)
+
+
+def create_xcb() -> Optional[XcbWindows]:
+    """
+    Create an XCB window query connection if xcffib and the display are available
+
+    Returns:
+        XcbWindows instance, or None if callers should fall back to the xdotool command
+    """
+    if xcffib is None:
+        logger.debug("xcffib not installed, falling back to xdotool command")
+        return None
+    try:
+        return XcbWindows()
+    except xcffib.XcffibException as e:
+        logger.debug("X connection through xcffib failed, falling back to xdotool command: %s", e)
+        return None
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+libxdo bindings module
+Calls the library behind the xdotool command directly through ctypes,
+avoiding a process launch and X connection per window query
+
+Author: Stephen Chen
+Company: Navinfo
+"""
+
+import ctypes
+import ctypes.util
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+XDO_SUCCESS = 0
+
+
+class XErrorEvent(ctypes.Structure):
+    """Xlib XErrorEvent, passed to X error handlers"""
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('display', ctypes.c_void_p),
+        ('resourceid', ctypes.c_ulong),
+        ('serial', ctypes.c_ulong),
+        ('error_code', ctypes.c_ubyte),
+        ('request_code', ctypes.c_ubyte),
+        ('minor_code', ctypes.c_ubyte),
+    ]
+
+
+X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+
+@X_ERROR_HANDLER
+def _ignore_x_error(display, event) -> int:
+    """X error handler that logs the error instead of exiting the process"""
+    error = event.contents
+    logger.debug(
+        "Ignoring X error %s of request %s on resource %s",
+        error.error_code, error.request_code, error.resourceid
+    )
+    return 0
+
+
+class Xdo:
+    """Window queries through a persistent libxdo handle"""
+
+    def __init__(self):
+        """
+        Load libxdo and open an X connection
+
+        Raises:
+            OSError: If libxdo cannot be loaded or the display cannot be opened
+        """
+        lib_path = ctypes.util.find_library('xdo') or 'libxdo.so.3'
+        self._lib = ctypes.CDLL(lib_path)
+        x11_path = ctypes.util.find_library('X11') or 'libX11.so.6'
+        self._x11 = ctypes.CDLL(x11_path)
+
+        self._lib.xdo_new.argtypes = [ctypes.c_char_p]
+        self._lib.xdo_new.restype = ctypes.c_void_p
+        self._lib.xdo_free.argtypes = [ctypes.c_void_p]
+        self._lib.xdo_free.restype = None
+        self._lib.xdo_get_focused_window_sane.argtypes = [
+            ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulong)
+        ]
+        self._lib.xdo_get_active_window.argtypes = [
+            ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulong)
+        ]
+        self._lib.xdo_get_window_name.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(ctypes.c_char_p),
+            ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)
+        ]
+        self._lib.xdo_get_window_location.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_int), ctypes.c_void_p
+        ]
+        self._lib.xdo_get_window_size.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(ctypes.c_uint),
+            ctypes.POINTER(ctypes.c_uint)
+        ]
+        self._x11.XFree.argtypes = [ctypes.c_void_p]
+        self._x11.XSetErrorHandler.argtypes = [X_ERROR_HANDLER]
+        self._x11.XSetErrorHandler.restype = ctypes.c_void_p
+
+        # Xlib's default handler exits the process on errors such as BadWindow
+        # when a window closes between lookup and query, libxdo calls then just
+        # fail. The handler is process wide and kept alive at module level.
+        self._x11.XSetErrorHandler(_ignore_x_error)
+
+        self._xdo = self._lib.xdo_new(None)
+        if not self._xdo:
+            raise OSError("xdo_new failed, cannot open display")
+
+        # Reused output argument for window queries
+        self._win = ctypes.c_ulong()
+
+    def close(self) -> None:
+        """Release the libxdo handle and its X connection"""
+        if self._xdo:
+            self._lib.xdo_free(self._xdo)
+            self._xdo = None
+
+    def get_focused_window(self) -> Optional[str]:
+        """Get the focused top-level window ID, like `xdotool getwindowfocus`"""
+        if self._lib.xdo_get_focused_window_sane(self._xdo, ctypes.byref(self._win)) != XDO_SUCCESS:
+            return None
+        return str(self._win.value) if self._win.value else None
+
+    def get_active_window(self) -> Optional[str]:
+        """Get the active window ID, like `xdotool getactivewindow`"""
+        if self._lib.xdo_get_active_window(self._xdo, ctypes.byref(self._win)) != XDO_SUCCESS:
+            return None
+        return str(self._win.value) if self._win.value else None
+
+    def get_window_name(self, window_id: str) -> Optional[str]:
+        """Get the window title, like `xdotool getwindowname`"""
+        name = ctypes.c_char_p()
+        name_len = ctypes.c_int()
+        name_type = ctypes.c_int()
+        ret = self._lib.xdo_get_window_name(
+            self._xdo, int(window_id), ctypes.byref(name),
+            ctypes.byref(name_len), ctypes.byref(name_type)
+        )
+        if ret != XDO_SUCCESS:
+            return None
+        address = ctypes.cast(name, ctypes.c_void_p).value
+        if not address:
+            return None
+        try:
+            return ctypes.string_at(address, name_len.value).decode('utf-8', errors='replace')
+        finally:
+            # The name is allocated by Xlib
+            self._x11.XFree(address)
+
+    def get_window_geometry(self, window_id: str) -> Optional[Tuple[int, int, int, int]]:
+        """Get window geometry (x, y, width, height), like `xdotool getwindowgeometry`"""
+        x, y = ctypes.c_int(), ctypes.c_int()
+        width, height = ctypes.c_uint(), ctypes.c_uint()
+        wid = int(window_id)
+        if self._lib.xdo_get_window_location(
+            self._xdo, wid, ctypes.byref(x), ctypes.byref(y), None
+        ) != XDO_SUCCESS:
+            return None
+        if self._lib.xdo_get_window_size(
+            self._xdo, wid, ctypes.byref(width), ctypes.byref(height)
+        ) != XDO_SUCCESS:
+            return None
+        return (x.value, y.value, width.value, height.value)
+
+
+def create_xdo() -> Optional[Xdo]:
+    """
+    Create a libxdo wrapper if the library and display are available
+
+    Returns:
+        Xdo instance, or None if callers should fall back to the xdotool command
+    """
+    try:
+        return Xdo()
+    except (OSError, AttributeError) as e:
+        logger.debug("libxdo unavailable, falling back to xdotool command: %s", e)
+        return None
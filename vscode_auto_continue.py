@@ -10,21 +10,42 @@ Company: Navinfo
 import pyautogui
 import time
 import logging
-import subprocess
 import os
-import numpy as np
-from typing import Optional, List
+import signal
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, List, Tuple
 
 # Import our new modules
-from utils.app_config import setup_app_config
+from utils.app_config import flush_logs, setup_app_config
 from screen_capture import ScreenCapture
 from template_matcher import TemplateMatcher
-from debug_utils import debug_mark_positions
 
 logger = logging.getLogger(__name__)
 
+# Cap of the backoff exponent while VSCode is not running
+MAX_MISS_STREAK = 4
+# Longest wait (seconds) between detection cycles while backing off
+MAX_BACKOFF_INTERVAL = 600
+# Seconds to reuse the result of the VSCode process check
+VSCODE_CHECK_TTL = 5.0
+# Debug screenshots being marked or waiting to be, newer ones are dropped beyond it
+MAX_PENDING_DEBUG_MARKS = 2
+# Pixel stride of the frame sample hashed to detect an unchanged screen
+FRAME_HASH_STRIDE = 16
+# Niceness added at startup so the detector yields the CPU to VSCode
+DEFAULT_NICE = 10
+
 
 class VSCodeAutoContinue:
+    __slots__ = (
+        'threshold', 'debug_mode', 'default_interval', 'debug_output_dir', 'debug_output_format',
+        'screen_capture', 'template_matcher', '_miss_streak', '_vscode_cache', '_debug_mark', '_stop',
+        '_debug_pool', '_debug_slots', '_last_frame_hash',
+    )
+    
     def __init__(self, template_paths: Optional[List[str]] = None):
         """
         Initialize auto continue button clicker
@@ -36,23 +57,65 @@ class VSCodeAutoContinue:
         pyautogui.FAILSAFE = True
         pyautogui.PAUSE = 0.1
         
-        # Load configuration and setup logging
+        # Load configuration and setup logging, settings are resolved from it
+        # once below and the config itself is not kept
         config = setup_app_config()
         
-        # Store config for later use
-        self.config = config
-        
         # Matching threshold from config
         self.threshold = config.get('threshold', 0.8) if config else 0.8
         
         # Debug mode - save screenshots with marked positions
         self.debug_mode = config.get('debug_mode', False) if config else False
+        self.debug_output_dir = config.get('debug_output_dir', '/tmp') if config else '/tmp'
+        self.debug_output_format = config.get('debug_output_format', 'jpg') if config else 'jpg'
+        
+        # Detection interval (seconds) when none is given to run_continuously
+        self.default_interval = config.get('default_interval', 60) if config else 60
+        
+        # Consecutive cycles without a running VSCode, used to back off polling
+        self._miss_streak = 0
+        # (monotonic time of the last VSCode process check, its result)
+        self._vscode_cache = (float('-inf'), False)
+        # debug_utils.debug_mark_positions, imported on first use in debug mode
+        self._debug_mark = None
+        # Marks debug screenshots off the detection thread, created on first use
+        self._debug_pool: Optional[ThreadPoolExecutor] = None
+        self._debug_slots = threading.Semaphore(MAX_PENDING_DEBUG_MARKS)
+        # (shape, hash) of the last frame searched without finding the button
+        self._last_frame_hash: Optional[Tuple[tuple, int]] = None
+        # Set by SIGINT/SIGTERM to end run_continuously
+        self._stop = threading.Event()
+        
+        # Lower the priority before any worker thread starts, threads inherit it
+        self._lower_priority(config.get('nice', DEFAULT_NICE) if config else DEFAULT_NICE)
         
         # Initialize components
         self.screen_capture = ScreenCapture(config)
         self.template_matcher = TemplateMatcher(config)
         logger.debug("VSCodeAutoContinue initialized")
     
+    @staticmethod
+    def _lower_priority(nice: int) -> None:
+        """
+        Run the detector only when the CPU is otherwise idle
+        
+        Args:
+            nice: Niceness increment, 0 keeps the normal priority
+        """
+        if not nice:
+            return
+        try:
+            os.nice(nice)
+        except OSError as e:
+            logger.warning("Failed to lower process priority: %s", e)
+            return
+        # SCHED_IDLE is Linux only, the niceness above still applies elsewhere
+        try:
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+        except (AttributeError, OSError) as e:
+            logger.debug("SCHED_IDLE not available: %s", e)
+        logger.debug("Process priority lowered by %s", nice)
+    
     def click_continue_button(self, x: int, y: int, w: int, h: int, offset_x: int = 0, offset_y: int = 0, template_path: str = "") -> None:
         """
         Click continue button at calculated position
@@ -72,25 +135,66 @@ class VSCodeAutoContinue:
             screen_y = offset_y + y + int(h * 0.66)
             
             pyautogui.click(screen_x, screen_y)
-            logger.info(f"Clicked continue button at screen position: ({screen_x}, {screen_y}) "
-                       f"(relative position: ({x + w // 2}, {y + int(h * 0.66)}) with window offset: ({offset_x}, {offset_y})")
+            logger.info(
+                "Clicked continue button at screen position: (%s, %s) "
+                "(relative position: (%s, %s) with window offset: (%s, %s)",
+                screen_x, screen_y, screen_x - offset_x, screen_y - offset_y, offset_x, offset_y
+            )
         except Exception as e:
-            logger.error(f"Button click failed: {e}")
+            logger.error("Button click failed: %s", e)
     
     def is_vscode_running(self) -> bool:
         """
         Check if VSCode is running
         
+        Scans /proc in-process instead of spawning pgrep, the result is reused
+        for VSCODE_CHECK_TTL seconds.
+        
         Returns:
             True if VSCode is running, False otherwise
         """
+        checked_at, running = self._vscode_cache
+        now = time.monotonic()
+        if now - checked_at < VSCODE_CHECK_TTL:
+            return running
+        
+        try:
+            running = self._scan_proc_for_vscode()
+        except OSError as e:
+            logger.debug("Cannot scan /proc, falling back to pgrep: %s", e)
+            running = self._pgrep_vscode()
+        logger.debug("VSCode process check: %s", running)
+        self._vscode_cache = (now, running)
+        return running
+    
+    @staticmethod
+    def _scan_proc_for_vscode() -> bool:
+        """Look for a process whose name contains 'code', like `pgrep code`"""
+        with os.scandir('/proc') as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(f'/proc/{entry.name}/comm', 'rb') as comm_file:
+                        if b'code' in comm_file.read():
+                            return True
+                except OSError:
+                    # The process exited during the scan
+                    continue
+        return False
+    
+    @staticmethod
+    def _pgrep_vscode() -> bool:
+        """Check for a VSCode process with pgrep"""
+        # Only needed when /proc cannot be read
+        import subprocess
         try:
             result = subprocess.run(['pgrep', 'code'], 
                                   capture_output=True, text=True)
-            logger.debug(f"VSCode process check - return code: {result.returncode}, stdout: {result.stdout}")
+            logger.debug("VSCode process check - return code: %s, stdout: %s", result.returncode, result.stdout)
             return result.returncode == 0
         except Exception as e:
-            logger.error(f"Failed to check VSCode running status: {e}")
+            logger.error("Failed to check VSCode running status: %s", e)
             return False
     
     def run_once(self) -> bool:
@@ -104,7 +208,9 @@ class VSCodeAutoContinue:
         # Check if VSCode is running
         if not self.is_vscode_running():
             logger.debug("VSCode is not running")
+            self._miss_streak = min(self._miss_streak + 1, MAX_MISS_STREAK)
             return False
+        self._miss_streak = 0
         
         # Capture screen
         capture_result = self.screen_capture.capture_screen()
@@ -113,65 +219,198 @@ class VSCodeAutoContinue:
             return False
         
         frame, offset_x, offset_y = capture_result
-        logger.debug(f"Screen captured successfully with shape: {frame.shape}, window offset: ({offset_x}, {offset_y})")
+        logger.debug("Screen captured successfully with shape: %s, window offset: (%s, %s)", frame.shape, offset_x, offset_y)
         
-        # Use integrated function to find continue button
-        logger.debug("Calling template_matcher.find_continue_button")
-        button_rect = self.template_matcher.find_continue_button(frame)
-        logger.debug(f"Template matching result: {button_rect}")
+        # The button cannot have appeared on a screen that has not changed
+        frame_hash = (
+            frame.shape, zlib.adler32(frame[::FRAME_HASH_STRIDE, ::FRAME_HASH_STRIDE].tobytes())
+        )
+        if frame_hash == self._last_frame_hash:
+            logger.debug("Screen unchanged since the last search, skipping template matching")
+            return False
+        
+        # Use integrated function to find continue button, debug mode also
+        # needs the button line area found on the way
+        if self.debug_mode:
+            logger.debug("Calling template_matcher.find_continue_button_and_line_area")
+            button_rect, button_line_area = self.template_matcher.find_continue_button_and_line_area(frame)
+        else:
+            logger.debug("Calling template_matcher.find_continue_button")
+            button_rect = self.template_matcher.find_continue_button(frame)
+        logger.debug("Template matching result: %s", button_rect)
         
         if button_rect is not None:
-            logger.info(f"Continue button found: {button_rect}")
-            # For debug mode, we need to simulate the button line area
-            # We'll just use the button rect as both for simplicity
+            logger.info("Continue button found: %s", button_rect)
             if self.debug_mode:
-                debug_frame = frame.copy()
-                debug_output_dir = self.config.get('debug_output_dir', '/tmp') if self.config else '/tmp'
-                
-                # Get the button line area for debugging
-                button_line_area = self.template_matcher.find_button_line_area(frame)
-                if button_line_area is not None:
-                    debug_mark_positions(debug_frame, button_line_area, button_rect, debug_output_dir)
-                else:
-                    # Fallback if we can't get the line area
-                    debug_mark_positions(debug_frame, button_rect, button_rect, debug_output_dir)
+                # Fallback to the button rect if we can't get the line area
+                self._submit_debug_mark(
+                    frame, button_line_area if button_line_area is not None else button_rect, button_rect
+                )
             
-            # Click continue button with window offset
+            # Click continue button with window offset, the click changes the screen
+            self._last_frame_hash = None
             self.click_continue_button(*button_rect, offset_x, offset_y)
             return True
         else:
             logger.debug("Continue button not found in this frame")
         
+        self._last_frame_hash = frame_hash
         return False
     
+    def _submit_debug_mark(
+        self, frame, button_line_area: Tuple[int, int, int, int], button_rect: Tuple[int, int, int, int]
+    ) -> None:
+        """
+        Mark and save a debug screenshot on a background thread
+        
+        Args:
+            frame: Screen screenshot
+            button_line_area: Button line area coordinates (x, y, width, height)
+            button_rect: Button coordinates (x, y, width, height)
+        """
+        if not self._debug_slots.acquire(blocking=False):
+            logger.warning("Debug screenshots pending, dropping this one")
+            return
+        if self._debug_pool is None:
+            from debug_utils import debug_mark_positions
+            self._debug_mark = debug_mark_positions
+            self._debug_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='debug-mark')
+        # The capture buffer is reused by the next cycle, copy it here and let
+        # the marking draw on that copy directly
+        future = self._debug_pool.submit(
+            self._debug_mark, frame.copy(), button_line_area, button_rect,
+            self.debug_output_dir, self.debug_output_format, copy_frame=False
+        )
+        future.add_done_callback(self._debug_mark_done)
+    
+    def _debug_mark_done(self, future) -> None:
+        """Free the pending slot of a finished debug screenshot"""
+        self._debug_slots.release()
+        if future.exception() is not None:
+            logger.error("Failed to mark debug screenshot: %s", future.exception())
+    
+    def shutdown(self) -> None:
+        """Wait for pending debug screenshots to be marked and written"""
+        if self._debug_pool is not None:
+            self._debug_pool.shutdown(wait=True)
+            self._debug_pool = None
+    
     def run_continuously(self, interval: Optional[int] = None) -> None:
         """
         Run detection program continuously
         
+        While VSCode is not running the wait doubles every cycle, up to
+        MAX_BACKOFF_INTERVAL, and drops back to the interval once it is found.
+        Cycles are scheduled against a monotonic deadline, so the time spent
+        detecting does not add up to drift. SIGINT and SIGTERM end the loop
+        after the current cycle.
+        
         Args:
             interval: Detection interval (seconds)
         """
         # Use default interval from config if not provided
         if interval is None:
-            interval = self.config.get('default_interval', 60) if self.config else 60
+            interval = self.default_interval
             
-        logger.info(f"Start continuous monitoring, detection interval: {interval} seconds")
-        while True:
+        logger.info("Start continuous monitoring, detection interval: %s seconds", interval)
+        # A stop from an earlier run must not end this one, cleared before a
+        # new signal can set it
+        self._stop.clear()
+        previous_handlers = self._install_signal_handlers()
+        deadline = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    logger.debug("Starting detection cycle")
+                    result = self.run_once()
+                    logger.debug("Detection cycle completed, result: %s", result)
+                    delay = max(interval, min(interval * 2 ** self._miss_streak, MAX_BACKOFF_INTERVAL))
+                    if delay > interval:
+                        logger.debug("VSCode not running, backing off to %s seconds", delay)
+                except Exception as e:
+                    logger.error("Runtime error: %s", e)
+                    delay = interval
+                # Write the cycle's buffered log records in one go
+                flush_logs()
+                
+                # Never try to catch up on cycles missed while suspended or overrunning
+                deadline = max(deadline + delay, time.monotonic())
+                self._stop.wait(max(0.0, deadline - time.monotonic()))
+            logger.info("Received interrupt signal, program exiting")
+        except KeyboardInterrupt:
+            logger.info("Received interrupt signal, program exiting")
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            self.shutdown()
+            flush_logs()
+    
+    def _install_signal_handlers(self) -> Dict[int, Any]:
+        """
+        Make SIGINT and SIGTERM set the stop event instead of raising
+        
+        Returns:
+            Previous handlers by signal number, empty if handlers cannot be
+            installed outside the main thread
+        """
+        previous_handlers = {}
+        if threading.current_thread() is not threading.main_thread():
+            logger.debug("Not in the main thread, signal handlers not installed")
+            return previous_handlers
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous_handlers[signum] = signal.signal(signum, self._handle_stop_signal)
+        return previous_handlers
+    
+    def _handle_stop_signal(self, signum, frame) -> None:
+        """Signal handler that stops run_continuously after the current cycle"""
+        self._stop.set()
+
+
+def _parse_args_fast(argv: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse the command line without argparse
+    
+    Args:
+        argv: Command line arguments without the program name
+        
+    Returns:
+        Dictionary with once, debug, interval and templates, or None if argv
+        needs argparse (help, unknown or malformed arguments)
+    """
+    args = {'once': False, 'debug': False, 'interval': None, 'templates': None}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ('--once', '--debug'):
+            args[arg[2:]] = True
+        elif arg == '--interval' or arg.startswith('--interval='):
+            if '=' in arg:
+                value = arg.split('=', 1)[1]
+            elif i + 1 < len(argv):
+                i += 1
+                value = argv[i]
+            else:
+                return None
             try:
-                logger.debug("Starting detection cycle")
-                result = self.run_once()
-                logger.debug(f"Detection cycle completed, result: {result}")
-                time.sleep(interval)
-            except KeyboardInterrupt:
-                logger.info("Received interrupt signal, program exiting")
-                break
-            except Exception as e:
-                logger.error(f"Runtime error: {e}")
-                time.sleep(interval)
+                args['interval'] = int(value)
+            except ValueError:
+                return None
+        elif arg == '--templates':
+            templates = []
+            while i + 1 < len(argv) and not argv[i + 1].startswith('-'):
+                i += 1
+                templates.append(argv[i])
+            if not templates:
+                return None
+            args['templates'] = templates
+        else:
+            return None
+        i += 1
+    return args
 
 
-def main():
-    """Main function"""
+def _parse_args_argparse(argv: List[str]) -> Dict[str, Any]:
+    """Parse the command line with argparse, for help and error messages"""
     import argparse
     
     parser = argparse.ArgumentParser(
@@ -198,23 +437,33 @@ def main():
         help='Enable debug mode to save screenshots with marked positions'
     )
     
-    args = parser.parse_args()
+    return vars(parser.parse_args(argv))
+
+
+def main():
+    """Main function"""
+    argv = sys.argv[1:]
+    # argparse is only built when the arguments need its help or error output
+    args = _parse_args_fast(argv)
+    if args is None:
+        args = _parse_args_argparse(argv)
     
     # Create auto continue instance
-    auto_continue = VSCodeAutoContinue(template_paths=args.templates)
+    auto_continue = VSCodeAutoContinue(template_paths=args['templates'])
     
     # Override debug mode if specified in command line
-    if args.debug:
+    if args['debug']:
         auto_continue.debug_mode = True
     
-    if args.once:
+    if args['once']:
         # Execute once
         logger.debug("Running in 'once' mode")
         auto_continue.run_once()
+        auto_continue.shutdown()
     else:
         # Run continuously
         logger.debug("Running in continuous mode")
-        auto_continue.run_continuously(args.interval)
+        auto_continue.run_continuously(args['interval'])
 
 
 if __name__ == "__main__":